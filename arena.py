@@ -0,0 +1,274 @@
+"""Headless multi-snake board.
+
+Arena is SnakeSim for several snakes on one board: they share the food,
+power-ups and obstacles, and each has its own score, speed and power-up
+timers. Every snake moves on its own schedule, like the single-player
+snake, and all moves in a tick are resolved together: collisions are
+checked against the board as it was before anyone moved, and two heads
+entering the same cell both die. A dead snake leaves the board at once and
+can respawn.
+
+step() returns the tick's changes as events, which is all a client needs
+to mirror the board:
+
+    ("join", player_id, cells)      ("leave", player_id)
+    ("move", player_id, head, tail) ("die", player_id, reason)
+    ("score", player_id, score)     ("food", pos)
+    ("power_up", pos, type)         ("power_up_gone", pos)
+    ("collect", player_id, pos, type)
+    ("obstacles", positions)
+
+tail is None when the snake grew.
+"""
+import random
+from collections import deque
+from grid import OccupancyGrid, FOOD, OBSTACLE, POWER_UP
+from sim import Direction, GameMode, Obstacle, PowerUp, PowerUpType, SnakeSim, TICK_RATE
+
+class Player:
+    # Per-snake rules shared with SnakeSim
+    set_direction = SnakeSim.set_direction
+    move_due = SnakeSim.move_due
+    apply_power_up = SnakeSim.apply_power_up
+    update_power_ups = SnakeSim.update_power_ups
+    
+    def __init__(self, player_id, pos, direction):
+        self.id = player_id
+        self.snake = deque([pos])
+        self.direction = direction
+        self.next_direction = direction
+        self.alive = True
+        self.score = 0
+        self.level = 1
+        self.speed = 8  # Initial speed
+        self.score_multiplier = 1
+        self.active_power_ups = {}
+        self.tick = 0  # The arena's tick, for move_due()
+        self.last_move = None
+    
+    @property
+    def head(self):
+        return self.snake[0]
+
+class Arena:
+    power_up_class = PowerUp
+    obstacle_class = Obstacle
+    
+    # Balance settings, as in SnakeSim
+    power_up_chance = 0.1
+    survival_points_per_obstacle = 50
+    survival_max_obstacles = 15
+    
+    # Board rules shared with SnakeSim; the arena's score and level, which
+    # pick the obstacle count, are the best of any player
+    generate_food = SnakeSim.generate_food
+    place_food = SnakeSim.place_food
+    spawn_power_up = SnakeSim.spawn_power_up
+    generate_obstacles = SnakeSim.generate_obstacles
+    update_board_power_ups = SnakeSim.update_board_power_ups
+    
+    def __init__(self, grid_width, grid_height, game_mode=GameMode.CLASSIC, seed=None):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.game_mode = game_mode
+        self.rng = random.Random(seed)
+        self.grid = OccupancyGrid(grid_width, grid_height)
+        
+        self.players = {}
+        self.next_id = 1
+        self.power_ups = []
+        self.obstacles = []
+        self.obstacles_version = 0
+        self.food = None
+        self.score = 0
+        self.level = 1
+        self.tick = 0
+        self.time_left = 60  # For time attack mode; every snake dies when it runs out
+        self.events = []
+        
+        self.place_food()
+        self.generate_obstacles()
+    
+    def spawn_point(self):
+        """A free cell with room ahead, and the direction facing that room."""
+        for _ in range(50):
+            pos = self.grid.random_free(self.rng)
+            if pos is None:
+                return None, None
+            direction = Direction.RIGHT if pos[0] < self.grid_width // 2 else Direction.LEFT
+            dx = direction.value[0]
+            ahead = [(pos[0] + dx * step, pos[1]) for step in range(1, 4)]
+            if all(0 <= x < self.grid_width and self.grid.is_free((x, y)) for x, y in ahead):
+                return pos, direction
+        return pos, direction
+    
+    def add_player(self):
+        """Put a new snake on the board and return its id."""
+        player_id = self.next_id
+        self.next_id += 1
+        self.respawn(player_id)
+        return player_id
+    
+    def respawn(self, player_id):
+        """Start player_id over as a new snake. Returns False if the board is full."""
+        player = self.players.get(player_id)
+        if player is not None and player.alive:
+            self.remove_body(player)
+        pos, direction = self.spawn_point()
+        if pos is None:
+            return False
+        player = self.players[player_id] = Player(player_id, pos, direction)
+        player.tick = self.tick
+        self.grid.add_body(pos)
+        self.events.append(("join", player_id, [pos]))
+        return True
+    
+    def remove_player(self, player_id):
+        player = self.players.pop(player_id, None)
+        if player is None:
+            return
+        if player.alive:
+            self.remove_body(player)
+        self.events.append(("leave", player_id))
+    
+    def set_direction(self, player_id, direction):
+        player = self.players.get(player_id)
+        if player is not None and player.alive:
+            player.set_direction(direction)
+    
+    def remove_body(self, player):
+        for pos in player.snake:
+            self.grid.remove_body(pos)
+    
+    def kill(self, player, reason):
+        self.remove_body(player)
+        player.alive = False
+        self.events.append(("die", player.id, reason))
+    
+    def step(self):
+        """Advance every snake by one tick. Returns the events since the last step."""
+        alive = [player for player in self.players.values() if player.alive]
+        
+        if self.game_mode == GameMode.TIME_ATTACK:
+            self.time_left -= 1 / TICK_RATE
+            if self.time_left <= 0:
+                for player in alive:
+                    self.kill(player, "time_up")
+                alive = []
+                self.time_left = 60
+        
+        movers = []
+        for player in alive:
+            player.tick = self.tick
+            if player.move_due():
+                movers.append(player)
+        self.tick += 1
+        now = self.tick * 1000 / TICK_RATE
+        
+        # Judge every move against the board as it stands, then apply them
+        targets = []
+        heads = {}
+        deaths = []
+        for player in movers:
+            player.tick = self.tick
+            player.last_move = now
+            player.direction = player.next_direction
+            dx, dy = player.direction.value
+            new_head = (player.head[0] + dx, player.head[1] + dy)
+            if PowerUpType.GHOST_MODE not in player.active_power_ups:
+                if not (0 <= new_head[0] < self.grid_width and 0 <= new_head[1] < self.grid_height):
+                    deaths.append((player, "wall"))
+                    continue
+            else:
+                new_head = (new_head[0] % self.grid_width, new_head[1] % self.grid_height)
+            targets.append((player, new_head))
+            heads[new_head] = heads.get(new_head, 0) + 1
+        
+        moving = []
+        for player, new_head in targets:
+            if PowerUpType.INVINCIBILITY not in player.active_power_ups:
+                if self.grid.has_body(new_head):
+                    deaths.append((player, "self" if new_head in player.snake else "snake"))
+                    continue
+                if self.grid.has(new_head, OBSTACLE):
+                    deaths.append((player, "obstacle"))
+                    continue
+                if heads[new_head] > 1:
+                    deaths.append((player, "head_on"))
+                    continue
+            moving.append((player, new_head))
+        
+        for player, reason in deaths:
+            self.kill(player, reason)
+        eaters = [player for player, new_head in moving if self.move(player, new_head)]
+        # Spawn only once every snake has moved, so nothing lands on a cell
+        # a snake was already cleared to enter
+        for player in eaters:
+            self.feed(player)
+        
+        dropped = [power_up for power_up in self.power_ups if power_up.lifetime <= 1]
+        self.update_board_power_ups()
+        for power_up in dropped:
+            self.events.append(("power_up_gone", power_up.pos))
+        for player in self.players.values():
+            if player.alive:
+                player.update_power_ups()
+        
+        events = self.events
+        self.events = []
+        return events
+    
+    def move(self, player, new_head):
+        """Move one snake a cell and resolve pickups. Returns True if it ate.
+        
+        The food is taken off the board here and replaced by feed().
+        """
+        player.snake.appendleft(new_head)
+        self.grid.add_body(new_head)
+        
+        ate = new_head == self.food
+        if ate:
+            self.events.append(("move", player.id, new_head, None))
+            points = 10 * player.score_multiplier
+            if PowerUpType.DOUBLE_FOOD in player.active_power_ups:
+                points *= 2
+            player.score += points
+            self.score = max(self.score, player.score)
+            self.events.append(("score", player.id, player.score))
+            self.grid.remove(new_head, FOOD)
+            self.food = None
+        else:
+            tail = player.snake.pop()
+            self.grid.remove_body(tail)
+            self.events.append(("move", player.id, new_head, tail))
+        
+        # Check for power-up collection
+        if self.grid.has(new_head, POWER_UP):
+            for power_up in self.power_ups[:]:
+                if new_head == power_up.pos:
+                    self.power_ups.remove(power_up)
+                    self.grid.remove(new_head, POWER_UP)
+                    player.apply_power_up(power_up.type)
+                    self.events.append(("collect", player.id, new_head, power_up.type))
+        return ate
+    
+    def feed(self, player):
+        """Place new food and level up after player ate, as SnakeSim.move does."""
+        self.place_food()
+        self.events.append(("food", self.food))
+        
+        # Increase speed and level
+        if player.score % 100 == 0:
+            player.speed = min(player.speed + 1, 25)
+            player.level += 1
+            if player.level > self.level:
+                self.level = player.level
+                self.generate_obstacles()
+                self.events.append(("obstacles", [obstacle.pos for obstacle in self.obstacles]))
+        
+        # Spawn power-up occasionally
+        count = len(self.power_ups)
+        self.spawn_power_up()
+        if len(self.power_ups) > count:
+            power_up = self.power_ups[-1]
+            self.events.append(("power_up", power_up.pos, power_up.type))
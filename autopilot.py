@@ -0,0 +1,301 @@
+"""Pathfinding autopilot for SnakeSim.
+
+Autopilot picks the snake's direction each time it is about to move. It
+runs a breadth-first search from the head to the nearest food or power-up
+over the occupancy grid, and only takes that route if the snake could still
+reach its own tail after eating. Otherwise it chases its tail, and failing
+that picks the move that leaves it the most room, breaking ties along the
+board's Hamiltonian cycle. If it goes a board's worth of moves without
+growing, it takes the nearest route even when that check fails.
+
+With follow_cycle=True it plays the "perfect game" instead: it stays on the
+Hamiltonian cycle, only cutting across it where Cycle.shortcut_safe() allows,
+so on an obstacle-free board it fills every cell. Food the cycle misses,
+next to obstacles, is fetched by search as usual.
+
+Routes are cached and followed step by step until the target disappears,
+the obstacles change or the next cell is taken, so most moves cost a few
+lookups rather than a search. Adjacency lists and search buffers are built
+once per board and reused by every search, so one core can drive many bots.
+"""
+from array import array
+from collections import deque
+from grid import OBSTACLE, POWER_UP
+from hamiltonian import load_cycle
+from sim import Direction, OPPOSITE
+
+class Autopilot:
+    def __init__(self, sim, follow_cycle=False):
+        self.sim = sim
+        self.follow_cycle = follow_cycle
+        self.grid = sim.grid
+        width, height = self.grid.width, self.grid.height
+        
+        # (neighbor, direction) pairs for every cell, walls excluded
+        self.neighbors = []
+        for i in range(self.grid.size):
+            x, y = i % width, i // width
+            cells = []
+            for direction in Direction:
+                dx, dy = direction.value
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height:
+                    cells.append((ny * width + nx, direction))
+            self.neighbors.append(cells)
+        
+        # Search buffers: a cell was reached by the current search when
+        # seen[cell] == stamp, so they never need clearing
+        self.seen = array('I', bytes(4 * self.grid.size))
+        self.parent = array('i', bytes(4 * self.grid.size))
+        self.moves = [None] * self.grid.size
+        self.stamp = 0
+        
+        # Cached route: (cell, direction) steps still to take
+        self.path = deque()
+        self.target = None
+        self.expected_head = None
+        self.obstacles_version = None
+        self.searches = 0
+        
+        # Moves since the snake last grew; tail chasing can circle forever
+        # when no food route ever passes the safety check
+        self.length = 0
+        self.moves_since_growth = 0
+        self.patience = self.grid.size
+        
+        # Hamiltonian cycle for the current obstacle layout, loaded on demand
+        self.cycle = None
+        self.cycle_version = None
+    
+    def choose(self):
+        """Return the Direction for the snake's next move.
+        
+        Call once per move, i.e. when sim.move_due() is true.
+        """
+        sim = self.sim
+        if sim.game_over:
+            return None
+        head = self.grid.index(sim.head)
+        if len(sim.snake) != self.length:
+            self.length = len(sim.snake)
+            self.moves_since_growth = 0
+        else:
+            self.moves_since_growth += 1
+        
+        if self.follow_cycle and self.food_on_cycle():
+            direction = self.cycle_move(head)
+            return direction if direction is not None else self.fallback(head)
+        
+        if not self.route_valid(head):
+            self.path.clear()
+            self.plan(head)
+        if self.path:
+            cell, direction = self.path.popleft()
+            self.expected_head = cell
+            return direction
+        
+        self.expected_head = None
+        return self.fallback(head)
+    
+    def route_valid(self, head):
+        """Check the cached route can still be followed from head."""
+        if not self.path or head != self.expected_head:
+            return False
+        if self.sim.obstacles_version != self.obstacles_version:
+            return False
+        if self.target_cell_gone():
+            return False
+        cell = self.path[0][0]
+        return not self.grid.body[cell] and not self.grid.cells[cell] & OBSTACLE
+    
+    def target_cell_gone(self):
+        food = self.sim.food
+        if food is not None and self.grid.index(food) == self.target:
+            return False
+        return not self.grid.cells[self.target] & POWER_UP
+    
+    def plan(self, head):
+        """Search for a safe route to the nearest food or power-up and cache it."""
+        sim = self.sim
+        self.obstacles_version = sim.obstacles_version
+        goals = set()
+        if sim.food is not None:
+            goals.add(self.grid.index(sim.food))
+        for power_up in sim.power_ups:
+            goals.add(self.grid.index(power_up.pos))
+        if not goals:
+            return
+        
+        route = self.search(head, goals, self.grid.body, reverse=OPPOSITE[sim.direction])
+        if route is None:
+            return
+        # Stalled: take the route anyway rather than circle without end
+        if self.moves_since_growth > self.patience or self.tail_reachable_after(route):
+            self.path.extend(route)
+            self.target = route[-1][0]
+            self.expected_head = head
+    
+    def load_cycle(self):
+        """Return the Hamiltonian cycle around the current obstacles, or None."""
+        sim = self.sim
+        if self.cycle_version != sim.obstacles_version:
+            blocked = [self.grid.index(obstacle.pos) for obstacle in sim.obstacles]
+            self.cycle = load_cycle(self.grid.width, self.grid.height, blocked)
+            self.cycle_version = sim.obstacles_version
+        return self.cycle
+    
+    def food_on_cycle(self):
+        """Check the cycle reaches the food; food next to an obstacle may be off it."""
+        cycle = self.load_cycle()
+        food = self.sim.food
+        return cycle is not None and (food is None or cycle.on_cycle(self.grid.index(food)))
+    
+    def cycle_move(self, head):
+        """Follow the Hamiltonian cycle, taking safe shortcuts towards the food.
+        
+        Returns None if no move keeps to the cycle.
+        """
+        sim = self.sim
+        cycle = self.load_cycle()
+        if cycle is None or not cycle.on_cycle(head):
+            return None
+        tail = self.grid.index(sim.tail)
+        food = self.grid.index(sim.food) if sim.food is not None else None
+        
+        best = None
+        best_distance = cycle.length
+        for cell, direction in self.neighbors[head]:
+            if not cycle.on_cycle(cell) or not sim.is_safe(direction):
+                continue
+            if not cycle.shortcut_safe(head, cell, tail, len(sim.snake), food):
+                continue
+            # Fewest steps left to the food, or the plain next cell without food
+            distance = cycle.distance(cell, food) if food is not None and cycle.on_cycle(food) \
+                else cycle.distance(head, cell)
+            if distance < best_distance:
+                best, best_distance = direction, distance
+        return best
+    
+    def fallback(self, head):
+        """Chase the tail, or else take the move that leaves the most room."""
+        sim = self.sim
+        if len(sim.snake) > 1:
+            route = self.search(head, (), self.grid.body, self.grid.index(sim.tail),
+                                OPPOSITE[sim.direction])
+            if route is not None:
+                return route[0][1]
+        
+        # Among the moves leaving the most room, prefer the next cell on the cycle
+        cycle = self.load_cycle()
+        on_cycle = -1
+        if cycle is not None and cycle.on_cycle(head):
+            on_cycle = cycle.next_cell(head)
+        best = None
+        best_room = -1
+        for cell, direction in self.neighbors[head]:
+            if not sim.is_safe(direction):
+                continue
+            room = self.room(cell)
+            if room > best_room or room == best_room and cell == on_cycle:
+                best, best_room = direction, room
+        if best is None:
+            # Only wrapping (ghost mode) moves might be left
+            for direction in Direction:
+                if sim.is_safe(direction):
+                    return direction
+        return best
+    
+    def search(self, start, goals, body, tail=-1, reverse=None):
+        """Breadth-first search from start to the nearest cell in goals.
+        
+        Cells with body[cell] set or an obstacle are blocked. tail, if given,
+        is also a goal, but only two or more moves away, since the tail
+        still occupies its cell during the next move. The first step may not
+        go in the reverse direction, which the sim ignores. Returns the route
+        as [(cell, direction), ...] or None.
+        """
+        self.searches += 1
+        self.stamp += 1
+        stamp = self.stamp
+        seen = self.seen
+        parent = self.parent
+        moves = self.moves
+        neighbors = self.neighbors
+        cells = self.grid.cells
+        
+        seen[start] = stamp
+        frontier = [start]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for i in frontier:
+                for j, direction in neighbors[i]:
+                    if seen[j] == stamp or depth == 1 and direction == reverse:
+                        continue
+                    if j == tail:
+                        if depth >= 2:
+                            parent[j] = i
+                            moves[j] = direction
+                            return self.trace(start, j)
+                        continue
+                    if body[j] or cells[j] & OBSTACLE:
+                        continue
+                    seen[j] = stamp
+                    parent[j] = i
+                    moves[j] = direction
+                    if j in goals:
+                        return self.trace(start, j)
+                    next_frontier.append(j)
+            frontier = next_frontier
+        return None
+    
+    def trace(self, start, end):
+        route = []
+        cell = end
+        while cell != start:
+            route.append((cell, self.moves[cell]))
+            cell = self.parent[cell]
+        route.reverse()
+        return route
+    
+    def tail_reachable_after(self, route):
+        """Check the snake could still reach its tail after following route."""
+        snake = self.sim.snake
+        grows = self.sim.food is not None and route[-1][0] == self.grid.index(self.sim.food)
+        length = len(snake) + (1 if grows else 0)
+        
+        # Where the body would be on arrival, head first
+        body = [cell for cell, _ in reversed(route)]
+        if len(body) < length:
+            for pos in snake:
+                body.append(self.grid.index(pos))
+                if len(body) == length:
+                    break
+        body = body[:length]
+        if length < 2:
+            return True
+        
+        occupied = bytearray(self.grid.size)
+        for cell in body:
+            occupied[cell] = 1
+        return self.search(body[0], (), occupied, body[-1]) is not None
+    
+    def room(self, start):
+        """Number of cells reachable from start without crossing the body."""
+        self.stamp += 1
+        stamp = self.stamp
+        seen = self.seen
+        body = self.grid.body
+        cells = self.grid.cells
+        seen[start] = stamp
+        stack = [start]
+        count = 0
+        while stack:
+            i = stack.pop()
+            count += 1
+            for j, _ in self.neighbors[i]:
+                if seen[j] != stamp and not body[j] and not cells[j] & OBSTACLE:
+                    seen[j] = stamp
+                    stack.append(j)
+        return count
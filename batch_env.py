@@ -0,0 +1,371 @@
+"""Vectorized batch of snake games.
+
+BatchSnakeEnv holds N independent boards as NumPy arrays and advances all of
+them one tick per step() with whole-array operations. It mirrors the rules
+of SnakeSim.step for every GameMode and PowerUpType, without pygame, so bots
+and balance sweeps can run millions of game ticks per second on one core.
+
+Actions and directions are encoded as indices into ACTIONS
+(UP, DOWN, LEFT, RIGHT); -1 means "keep going". Cells are flat indices
+y * width + x. Known differences from SnakeSim: random numbers come from one
+NumPy generator, so games don't match SnakeSim seed-for-seed, and each board
+holds at most max_power_ups uncollected power-ups (further spawns are
+skipped).
+"""
+import numpy as np
+from sim import Direction, GameMode, PowerUpType, TICK_RATE
+
+ACTIONS = list(Direction)
+POWER_UP_TYPES = list(PowerUpType)
+MODES = list(GameMode)
+
+DX = np.array([d.value[0] for d in ACTIONS], dtype=np.int32)
+DY = np.array([d.value[1] for d in ACTIONS], dtype=np.int32)
+OPPOSITE = np.array([ACTIONS.index(Direction((-d.value[0], -d.value[1]))) for d in ACTIONS], dtype=np.int8)
+
+# Power-up indices and how long each lasts once collected
+SPEED_BOOST = POWER_UP_TYPES.index(PowerUpType.SPEED_BOOST)
+SCORE_MULTIPLIER = POWER_UP_TYPES.index(PowerUpType.SCORE_MULTIPLIER)
+INVINCIBILITY = POWER_UP_TYPES.index(PowerUpType.INVINCIBILITY)
+GHOST_MODE = POWER_UP_TYPES.index(PowerUpType.GHOST_MODE)
+DOUBLE_FOOD = POWER_UP_TYPES.index(PowerUpType.DOUBLE_FOOD)
+SLOW_TIME = POWER_UP_TYPES.index(PowerUpType.SLOW_TIME)
+DURATIONS = np.array([
+    10 * TICK_RATE if t in (PowerUpType.SCORE_MULTIPLIER, PowerUpType.DOUBLE_FOOD) else 5 * TICK_RATE
+    for t in POWER_UP_TYPES
+], dtype=np.int32)
+POWER_UP_LIFETIME = 5 * TICK_RATE
+
+CLASSIC = MODES.index(GameMode.CLASSIC)
+SURVIVAL = MODES.index(GameMode.SURVIVAL)
+TIME_ATTACK = MODES.index(GameMode.TIME_ATTACK)
+
+class BatchSnakeEnv:
+    def __init__(self, num_envs, grid_width=40, grid_height=30, game_mode=GameMode.CLASSIC,
+                 seed=None, max_power_ups=8, power_up_chance=0.1, auto_reset=False):
+        self.num_envs = n = num_envs
+        self.width = grid_width
+        self.height = grid_height
+        self.cells = c = grid_width * grid_height
+        self.max_power_ups = k = max_power_ups
+        self.power_up_chance = power_up_chance
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+        
+        # game_mode is one GameMode for every board or a sequence, one per board
+        if isinstance(game_mode, GameMode):
+            self.mode = np.full(n, MODES.index(game_mode), dtype=np.int8)
+        else:
+            self.mode = np.array([MODES.index(m) for m in game_mode], dtype=np.int8)
+        self.rows = np.arange(n)
+        
+        # Snake bodies as ring buffers of cells, head at body[i, head_ptr[i]]
+        self.body = np.zeros((n, c), dtype=np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int32)
+        self.length = np.zeros(n, dtype=np.int32)
+        
+        # Occupancy: snake segments per cell (an invincible snake can
+        # overlap itself) and obstacle cells
+        self.occupancy = np.zeros((n, c), dtype=np.uint16)
+        self.obstacle = np.zeros((n, c), dtype=bool)
+        self.food = np.zeros(n, dtype=np.int32)
+        
+        # Uncollected power-ups in fixed slots (cell -1 = empty slot)
+        self.power_up_cell = np.full((n, k), -1, dtype=np.int32)
+        self.power_up_type = np.zeros((n, k), dtype=np.int8)
+        self.power_up_life = np.zeros((n, k), dtype=np.int32)
+        
+        # Active power-up timers, and when each was switched on (collecting an
+        # already active power-up refreshes its timer but keeps its order)
+        self.active = np.zeros((n, len(POWER_UP_TYPES)), dtype=np.int32)
+        self.activated = np.zeros((n, len(POWER_UP_TYPES)), dtype=np.int64)
+        
+        self.direction = np.zeros(n, dtype=np.int8)
+        self.next_direction = np.zeros(n, dtype=np.int8)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int32)
+        self.speed = np.zeros(n, dtype=np.int32)
+        self.score_multiplier = np.ones(n, dtype=np.int32)
+        self.tick = np.zeros(n, dtype=np.int64)
+        self.last_move = np.zeros(n, dtype=np.float64)
+        self.time_left = np.zeros(n, dtype=np.float64)
+        self.done = np.zeros(n, dtype=bool)
+        self.won = np.zeros(n, dtype=bool)
+        
+        self.reset()
+    
+    def reset(self, envs=None):
+        """Reset the given boards (an index array or bool mask; all by default)."""
+        if envs is None:
+            envs = self.rows
+        elif np.asarray(envs).dtype == bool:
+            envs = np.flatnonzero(envs)
+        envs = np.asarray(envs, dtype=np.intp)
+        if len(envs) == 0:
+            return
+        
+        # Snake starts in the middle heading right
+        start = (self.height // 2) * self.width + self.width // 2
+        self.occupancy[envs] = 0
+        self.obstacle[envs] = False
+        self.body[envs, 0] = start
+        self.head_ptr[envs] = 0
+        self.length[envs] = 1
+        self.occupancy[envs, start] = 1
+        self.direction[envs] = ACTIONS.index(Direction.RIGHT)
+        self.next_direction[envs] = self.direction[envs]
+        
+        self.power_up_cell[envs] = -1
+        self.active[envs] = 0
+        self.food[envs] = -1
+        self.place_food(envs)
+        
+        self.score[envs] = 0
+        self.level[envs] = 1
+        self.speed[envs] = 8
+        self.score_multiplier[envs] = 1
+        self.tick[envs] = 0
+        self.last_move[envs] = -np.inf
+        self.time_left[envs] = 60
+        self.done[envs] = False
+        self.won[envs] = False
+        
+        for i in envs:
+            self.generate_obstacles(i)
+    
+    def is_free(self, envs, cells):
+        """Vectorized free-cell test: no snake, obstacle, food or power-up."""
+        return ((self.occupancy[envs, cells] == 0) &
+                ~self.obstacle[envs, cells] &
+                (self.food[envs] != cells) &
+                (self.power_up_cell[envs] != cells[:, None]).all(axis=1))
+    
+    def free_cells(self, i):
+        """All free cells of board i."""
+        free = (self.occupancy[i] == 0) & ~self.obstacle[i]
+        free[self.power_up_cell[i][self.power_up_cell[i] >= 0]] = False
+        if self.food[i] >= 0:
+            free[self.food[i]] = False
+        return np.flatnonzero(free)
+    
+    def random_free(self, envs, attempts=4):
+        """Pick a uniformly random free cell per board, or -1 if it is full.
+        
+        Most boards are mostly empty, so a few vectorized rejection rounds
+        place nearly everything; stragglers fall back to an exact pick.
+        """
+        result = np.full(len(envs), -1, dtype=np.int32)
+        pending = np.arange(len(envs))
+        for _ in range(attempts):
+            if len(pending) == 0:
+                return result
+            cells = self.rng.integers(0, self.cells, len(pending)).astype(np.int32)
+            ok = self.is_free(envs[pending], cells)
+            result[pending[ok]] = cells[ok]
+            pending = pending[~ok]
+        for j in pending:
+            free = self.free_cells(envs[j])
+            if len(free):
+                result[j] = free[self.rng.integers(len(free))]
+        return result
+    
+    def place_food(self, envs):
+        """Move the food on the given boards to new random free cells."""
+        self.food[envs] = -1
+        self.food[envs] = self.random_free(envs)
+        # Only power-ups are left off the snake: share a cell with one, as SnakeSim does
+        for i in envs[self.food[envs] < 0]:
+            cells = self.power_up_cell[i][self.power_up_cell[i] >= 0]
+            if len(cells):
+                self.food[i] = cells[self.rng.integers(len(cells))]
+    
+    def generate_obstacles(self, i):
+        """Lay out obstacles on board i for its level, score and mode."""
+        self.obstacle[i] = False
+        mode = self.mode[i]
+        if mode == SURVIVAL:
+            count = min(self.score[i] // 50, 15)
+        elif mode == CLASSIC:
+            count = min(self.level[i] - 1, 10) if self.level[i] > 1 else 0
+        else:
+            count = min(self.level[i] // 2, 5) if self.level[i] > 2 else 0
+        
+        envs = np.array([i])
+        for _ in range(count):
+            for _ in range(50):  # Prevent infinite loop
+                cell = self.random_free(envs)[0]
+                if cell < 0:
+                    return
+                x, y = cell % self.width, cell // self.width
+                # Keep obstacles off the outer ring
+                if 0 < x < self.width - 1 and 0 < y < self.height - 1:
+                    self.obstacle[i, cell] = True
+                    break
+    
+    def spawn_power_ups(self, envs):
+        """Give each of the given boards the usual chance to spawn a power-up."""
+        envs = envs[self.rng.random(len(envs)) < self.power_up_chance]
+        if len(envs) == 0:
+            return
+        types = self.rng.integers(0, len(POWER_UP_TYPES), len(envs))
+        cells = self.random_free(envs)
+        slots = np.argmin(self.power_up_cell[envs], axis=1)
+        ok = (cells >= 0) & (self.power_up_cell[envs, slots] < 0)
+        envs, slots = envs[ok], slots[ok]
+        self.power_up_cell[envs, slots] = cells[ok]
+        self.power_up_type[envs, slots] = types[ok]
+        self.power_up_life[envs, slots] = POWER_UP_LIFETIME
+    
+    def apply_power_ups(self, envs, types):
+        """Switch on collected power-ups (one per board)."""
+        new = self.active[envs, types] <= 0
+        self.activated[envs[new], types[new]] = self.tick[envs[new]] * len(POWER_UP_TYPES) + types[new]
+        self.active[envs, types] = DURATIONS[types]
+        
+        speed = envs[types == SPEED_BOOST]
+        self.speed[speed] = np.minimum(self.speed[speed] + 5, 25)
+        self.score_multiplier[envs[types == SCORE_MULTIPLIER]] = 2
+        slow = envs[types == SLOW_TIME]
+        self.speed[slow] = np.maximum(self.speed[slow] - 3, 3)
+    
+    def update_active_power_ups(self, live):
+        """Count down active power-ups on boards in the live mask and remove
+        the effects of expired ones."""
+        # Whole-array masked updates: cheaper than gathering the live rows
+        running = (self.active > 0) & live[:, None]
+        self.active -= running
+        expired = running & (self.active <= 0)
+        if not expired.any():
+            return
+        
+        self.score_multiplier[expired[:, SCORE_MULTIPLIER]] = 1
+        
+        # Speed boost and slow time both clamp speed, so when they expire on
+        # the same tick their effects are undone in activation order
+        speed = expired[:, SPEED_BOOST]
+        slow = expired[:, SLOW_TIME]
+        slow_first = slow & speed & (self.activated[:, SLOW_TIME] < self.activated[:, SPEED_BOOST])
+        self.speed[slow_first] = np.minimum(self.speed[slow_first] + 3, 20)
+        self.speed[speed] = np.maximum(self.speed[speed] - 5, 8)
+        later = slow & ~slow_first
+        self.speed[later] = np.minimum(self.speed[later] + 3, 20)
+    
+    def step(self, actions=None):
+        """Advance every unfinished board by one tick.
+        
+        actions is an int array of ACTIONS indices (-1 for no change) or None.
+        Returns (points, finished): the points scored this tick and which
+        boards ended on it. Finished boards stay done until reset(), or are
+        reset right away when auto_reset is on.
+        """
+        points = np.zeros(self.num_envs, dtype=np.int64)
+        finished = np.zeros(self.num_envs, dtype=bool)
+        envs = np.flatnonzero(~self.done)
+        
+        if actions is not None:
+            actions = np.asarray(actions)[envs]
+            turn = (actions >= 0) & (actions != OPPOSITE[self.direction[envs]])
+            self.next_direction[envs[turn]] = actions[turn]
+        
+        self.tick[envs] += 1
+        
+        # Time attack clock
+        timed = envs[self.mode[envs] == TIME_ATTACK]
+        self.time_left[timed] -= 1 / TICK_RATE
+        finished[timed[self.time_left[timed] <= 0]] = True
+        envs = envs[~finished[envs]]
+        
+        # Snakes move every 1000 // speed milliseconds of simulated time
+        now = self.tick[envs] * 1000 / TICK_RATE
+        due = now - self.last_move[envs] >= 1000 // self.speed[envs]
+        movers = envs[due]
+        self.last_move[movers] = now[due]
+        dead = self.move(movers, points)
+        finished[dead] = True
+        envs = envs[~finished[envs]]
+        
+        # Age uncollected power-ups, then active power-up timers
+        live = np.zeros(self.num_envs, dtype=bool)
+        live[envs] = True
+        occupied = (self.power_up_cell >= 0) & live[:, None]
+        self.power_up_life -= occupied
+        self.power_up_cell[occupied & (self.power_up_life <= 0)] = -1
+        self.update_active_power_ups(live)
+        
+        self.done |= finished
+        if self.auto_reset:
+            self.reset(finished)
+        return points, finished
+    
+    def move(self, envs, points):
+        """Move the snakes on the given boards. Returns the boards that died."""
+        if len(envs) == 0:
+            return envs
+        self.direction[envs] = self.next_direction[envs]
+        head = self.body[envs, self.head_ptr[envs]]
+        x = head % self.width + DX[self.direction[envs]]
+        y = head // self.width + DY[self.direction[envs]]
+        
+        # Walls kill, unless ghost mode wraps the snake around the board
+        ghost = self.active[envs, GHOST_MODE] > 0
+        outside = (x < 0) | (x >= self.width) | (y < 0) | (y >= self.height)
+        dead = outside & ~ghost
+        x %= self.width
+        y %= self.height
+        new_head = (y * self.width + x).astype(np.int32)
+        
+        # Body and obstacles kill unless invincible
+        vulnerable = self.active[envs, INVINCIBILITY] <= 0
+        hit = (self.occupancy[envs, new_head] > 0) | self.obstacle[envs, new_head]
+        dead |= hit & vulnerable
+        died = envs[dead]
+        envs, new_head = envs[~dead], new_head[~dead]
+        
+        # Push the new head
+        self.head_ptr[envs] = (self.head_ptr[envs] - 1) % self.cells
+        self.body[envs, self.head_ptr[envs]] = new_head
+        self.occupancy[envs, new_head] += 1
+        
+        # Boards that didn't eat drop their tail
+        ate = new_head == self.food[envs]
+        starve = envs[~ate]
+        tail = self.body[starve, (self.head_ptr[starve] + self.length[starve]) % self.cells]
+        self.occupancy[starve, tail] -= 1
+        
+        eaters = envs[ate]
+        if len(eaters):
+            gained = 10 * self.score_multiplier[eaters]
+            gained[self.active[eaters, DOUBLE_FOOD] > 0] *= 2
+            self.score[eaters] += gained
+            points[eaters] += gained
+            self.length[eaters] += 1
+            self.place_food(eaters)
+            
+            # Nowhere left to put food: the snake has filled the board
+            full = self.food[eaters] < 0
+            self.won[eaters[full]] = True
+            winners = eaters[full]
+            eaters = eaters[~full]
+            
+            # Level up every 100 points
+            levelled = eaters[self.score[eaters] % 100 == 0]
+            self.speed[levelled] = np.minimum(self.speed[levelled] + 1, 25)
+            self.level[levelled] += 1
+            for i in levelled:
+                self.generate_obstacles(i)
+            self.spawn_power_ups(eaters)
+        else:
+            winners = eaters
+        
+        # Collect power-ups under the new heads
+        alive = envs[~np.isin(envs, winners)] if len(winners) else envs
+        found = self.power_up_cell[alive] == self.body[alive, self.head_ptr[alive]][:, None]
+        got = found.any(axis=1)
+        if got.any():
+            slots = np.argmax(found[got], axis=1)
+            collectors = alive[got]
+            types = self.power_up_type[collectors, slots].astype(np.intp)
+            self.power_up_cell[collectors, slots] = -1
+            self.apply_power_ups(collectors, types)
+        
+        return np.concatenate((died, winners))
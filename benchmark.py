@@ -0,0 +1,315 @@
+"""Benchmarks for the simulation and rendering hot paths.
+    
+    python benchmark.py run --output before.json
+    python benchmark.py run --output after.json
+    python benchmark.py compare before.json after.json
+
+Every benchmark uses fixed seeds and reports the best of several repeats.
+Rendering goes to offscreen surfaces under SDL's dummy video and audio
+drivers, so no window or sound device is needed. compare exits with status 1
+if any metric got worse by more than --threshold.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def metric(value, unit, better):
+    """One result: better is "higher" or "lower"."""
+    return {"value": value, "unit": unit, "better": better}
+
+def best_time(func, repeats):
+    """Fastest wall time of func() over repeats runs, in seconds.
+    
+    The minimum is the least noisy estimate on a busy machine: anything
+    slower is interference, not the code. The collector is paused so its
+    pauses don't land in one run and not another.
+    """
+    times = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return min(times)
+
+def serpentine(width, height, count):
+    """count cells of a back-and-forth path over the board, head first."""
+    cells = []
+    for y in range(height):
+        xs = range(width) if y % 2 == 0 else range(width - 1, -1, -1)
+        for x in xs:
+            cells.append((x, y))
+            if len(cells) == count:
+                return cells[::-1]
+    return cells[::-1]
+
+def setup_board(sim, length, obstacles, seed=1):
+    """Reset sim to a snake of the given length plus random obstacles.
+    
+    The snake is made invincible and ghostly so it can run indefinitely,
+    and fast enough to move on every tick.
+    """
+    from grid import OBSTACLE
+    from sim import PowerUpType, TICK_RATE
+    sim.reset(seed)
+    sim.grid.clear()
+    sim.obstacles = []
+    sim.power_ups = []
+    sim.snake.clear()
+    for pos in serpentine(sim.grid_width, sim.grid_height, length):
+        sim.snake.append(pos)
+        sim.grid.add_body(pos)
+    for _ in range(obstacles):
+        pos = sim.grid.random_free(sim.rng)
+        if pos is None:
+            break
+        sim.obstacles.append(sim.obstacle_class(pos))
+        sim.grid.add(pos, OBSTACLE)
+    sim.obstacles_version += 1
+    sim.food = None
+    sim.place_food()
+    sim.active_power_ups = {
+        PowerUpType.INVINCIBILITY: 10 ** 9,
+        PowerUpType.GHOST_MODE: 10 ** 9
+    }
+    sim.speed = TICK_RATE
+
+def bench_update(screen, quick):
+    """SnakeGame.update ticks per second by snake length and obstacle count."""
+    from game import SnakeGame
+    game = SnakeGame(screen)
+    ticks = 2000 if quick else 10000
+    results = {}
+    for length in (1, 100, 400):
+        for obstacles in (0, 50):
+            setup_board(game.sim, length, obstacles)
+            def run():
+                for _ in range(ticks):
+                    game.update()
+            seconds = best_time(run, 5)
+            results[f"update.len{length}.obstacles{obstacles}"] = metric(
+                ticks / seconds, "ticks/s", "higher")
+    return results
+
+def bench_generate_food(screen, quick):
+    """generate_food cost as the board fills up."""
+    from sim import SnakeSim
+    sim = SnakeSim(40, 30, seed=1)
+    calls = 2000 if quick else 20000
+    results = {}
+    for fill in (0.5, 0.9, 0.99):
+        setup_board(sim, int(sim.grid_width * sim.grid_height * fill), 0)
+        def run():
+            for _ in range(calls):
+                sim.generate_food()
+        seconds = best_time(run, 5)
+        results[f"generate_food.fill{int(fill * 100)}"] = metric(
+            seconds / calls * 1e6, "us/call", "lower")
+    return results
+
+def bench_particles(screen, quick):
+    """Particle update and render with large bursts on screen."""
+    import pygame
+    from particles import ParticleSystem
+    frames = 60 if quick else 240
+    surface = pygame.Surface(screen.get_size())
+    results = {}
+    for burst in (200, 2000):
+        particles = ParticleSystem(seed=1)
+        def run():
+            particles.clear()
+            for frame in range(frames):
+                if frame % 10 == 0:
+                    particles.emit(400, 300, (255, 0, 0), burst)
+                particles.update()
+                particles.render(surface)
+        seconds = best_time(run, 3)
+        results[f"particles.burst{burst}"] = metric(seconds / frames * 1000, "ms/frame", "lower")
+    return results
+
+def bench_render(screen, quick):
+    """SnakeGame.render frame time, full redraw and dirty-rect mode."""
+    import pygame
+    from game import SnakeGame
+    from sim import PowerUpType
+    frames = 200 if quick else 1000
+    results = {}
+    for dirty_rects in (False, True):
+        surface = pygame.Surface(screen.get_size(), 0, screen)
+        game = SnakeGame(surface, dirty_rects=dirty_rects)
+        setup_board(game.sim, 200, 20)
+        for i, power_type in enumerate(PowerUpType):
+            game.sim.power_ups.append(game.sim.power_up_class((2 + 3 * i, 25), power_type))
+            game.sim.power_ups[-1].lifetime = 10 ** 9
+        game.invalidate()
+        def run():
+            for frame in range(frames):
+                game.update()
+                if frame % 20 == 0:
+                    game.create_particles(game.sim.head, (255, 0, 0), 15)
+                game.render()
+        seconds = best_time(run, 5)
+        name = "render.dirty" if dirty_rects else "render.full"
+        results[name] = metric(seconds / frames * 1000, "ms/frame", "lower")
+    return results
+
+def bench_sounds(screen, quick):
+    """load_sounds time with a cold and a warm synthesis cache."""
+    import synth
+    from game import SnakeGame
+    game = SnakeGame(screen)
+    game.audio_thread.join()  # Let the background load finish first
+    saved = synth.CACHE_DIR
+    results = {}
+    try:
+        cold = []
+        for _ in range(3):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                synth.CACHE_DIR = cache_dir
+                cold.append(best_time(game.load_sounds, 1))
+                warm = best_time(game.load_sounds, 5)
+        results["sounds.cold"] = metric(min(cold) * 1000, "ms", "lower")
+        results["sounds.warm"] = metric(warm * 1000, "ms", "lower")
+    finally:
+        synth.CACHE_DIR = saved
+    return results
+
+def bench_imports(screen, quick):
+    """Cold-start import time of the game modules, in a fresh interpreter."""
+    code = ("import time; start = time.perf_counter(); import game, menu; "
+            "print(time.perf_counter() - start)")
+    times = []
+    for _ in range(3 if quick else 7):
+        output = subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True,
+                                capture_output=True, text=True).stdout
+        times.append(float(output.split()[-1]))
+    return {"import.game_menu": metric(min(times) * 1000, "ms", "lower")}
+
+def bench_startup(screen, quick):
+    """Time from launching main.py to its first menu frame."""
+    times = []
+    for _ in range(3 if quick else 7):
+        output = subprocess.run([sys.executable, "main.py", "--startup-metric"], cwd=HERE,
+                                check=True, capture_output=True, text=True).stdout
+        times.append(json.loads(output.splitlines()[-1])["first_menu_frame_ms"])
+    return {"startup.first_menu_frame": metric(min(times), "ms", "lower")}
+
+BENCHMARKS = {
+    "update": bench_update,
+    "generate_food": bench_generate_food,
+    "particles": bench_particles,
+    "render": bench_render,
+    "sounds": bench_sounds,
+    "imports": bench_imports,
+    "startup": bench_startup
+}
+
+def run(args):
+    import pygame
+    import numpy as np
+    
+    sys.path.insert(0, HERE)
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    
+    results = {}
+    # Work in a scratch directory so score and replay files stay out of the tree
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            for name in args.only or BENCHMARKS:
+                started = time.perf_counter()
+                results.update(BENCHMARKS[name](screen, args.quick))
+                print(f"{name}: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        finally:
+            os.chdir(cwd)
+    pygame.quit()
+    
+    report = {
+        "meta": {
+            "time": int(time.time()),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "quick": args.quick
+        },
+        "results": results
+    }
+    for name, result in results.items():
+        print(f"{name:<36} {result['value']:>14.2f} {result['unit']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+    
+    regressions = 0
+    for name in sorted(set(baseline) & set(current)):
+        old, new = baseline[name], current[name]
+        if old["value"] == 0:
+            continue
+        change = (new["value"] - old["value"]) / old["value"]
+        # Positive means worse, whichever way the metric points
+        worse = -change if old["better"] == "higher" else change
+        flag = ""
+        if worse > args.threshold:
+            flag = "REGRESSION"
+            regressions += 1
+        elif worse < -args.threshold:
+            flag = "improved"
+        print(f"{name:<36} {old['value']:>12.2f} -> {new['value']:>12.2f} "
+              f"{old['unit']:<9} {change:+7.1%}  {flag}")
+    for name in sorted(set(baseline) ^ set(current)):
+        print(f"{name:<36} only in {'baseline' if name in baseline else 'current'}")
+    
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Snake game benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--output", "-o", metavar="PATH", help="write results as JSON")
+    run_parser.add_argument("--quick", action="store_true", help="fewer iterations")
+    run_parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS),
+                            help="run only these benchmarks")
+    
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative change that counts as a regression (default: 0.10)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "run":
+        return run(args)
+    return compare(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
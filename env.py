@@ -0,0 +1,161 @@
+"""Gym-style environment over SnakeSim.
+
+    env = SnakeEnv(game_mode=GameMode.SURVIVAL)
+    obs = env.reset(seed=1)
+    while True:
+        obs, reward, done, info = env.step(action)
+        if done:
+            break
+
+Each step() takes one decision: it applies the action and advances the
+simulation until the snake has moved one cell (or the game ends), so the
+agent never spends steps waiting on the snake's speed. Actions are indices
+into ACTIONS, as in batch_env; -1 or None keeps going. The reward is the
+score gained during the step.
+
+The observation is a float32 (CHANNELS, height, width) array owned by the
+environment. Every call returns the same buffer, updated in place from the
+step's events instead of redrawn, so keep a copy if you need an old one.
+Channels are BODY, HEAD, FOOD, OBSTACLES, then one per PowerUpType at
+POWER_UPS + index for uncollected power-ups, and one per PowerUpType at
+TIMERS + index holding the active timer's remaining fraction over the whole
+plane.
+"""
+import numpy as np
+from batch_env import ACTIONS, DURATIONS, POWER_UP_TYPES
+from sim import GameMode, SnakeSim
+
+# Observation channels
+BODY = 0
+HEAD = 1
+FOOD = 2
+OBSTACLES = 3
+POWER_UPS = 4
+TIMERS = POWER_UPS + len(POWER_UP_TYPES)
+CHANNELS = TIMERS + len(POWER_UP_TYPES)
+
+class SnakeEnv:
+    def __init__(self, grid_width=40, grid_height=30, game_mode=GameMode.CLASSIC,
+                 seed=None, power_up_chance=0.1):
+        self.sim = SnakeSim(grid_width, grid_height, game_mode, seed)
+        self.sim.power_up_chance = power_up_chance
+        self.observation_shape = (CHANNELS, grid_height, grid_width)
+        self.num_actions = len(ACTIONS)
+        
+        # The observation, and a (CHANNELS, cells) view of it for flat cell indices
+        self.observation = np.zeros(self.observation_shape, dtype=np.float32)
+        self.planes = self.observation.reshape(CHANNELS, -1)
+        
+        # What the observation currently shows, to undo it cell by cell
+        self.head_cell = -1
+        self.food_cell = -1
+        self.power_up_cells = []
+        self.obstacles_version = None
+        self.timers = [0] * len(POWER_UP_TYPES)
+        
+        self.observe_all()
+    
+    def reset(self, seed=None, game_mode=None):
+        """Start a new game, optionally in another GameMode. Returns the observation."""
+        if game_mode is not None:
+            self.sim.game_mode = game_mode
+        self.sim.reset(seed)
+        self.observe_all()
+        return self.observation
+    
+    def step(self, action=None):
+        """Apply action and play until the snake moves. Returns (obs, reward, done, info)."""
+        sim = self.sim
+        direction = None
+        if action is not None and action >= 0:
+            direction = ACTIONS[action]
+        score = sim.score
+        events = []
+        reason = None
+        while not sim.game_over:
+            moving = sim.move_due()
+            for event in sim.step(direction):
+                events.append(event)
+                if event[0] == "move":
+                    self.observe_move(event[1], event[2])
+                elif event[0] == "game_over":
+                    reason = event[1]
+            direction = None
+            if moving:
+                break
+        
+        self.observe_board()
+        info = {
+            "score": sim.score,
+            "level": sim.level,
+            "length": len(sim.snake),
+            "tick": sim.tick,
+            "time_left": sim.time_left,
+            "events": events,
+            "reason": reason
+        }
+        return self.observation, sim.score - score, sim.game_over, info
+    
+    def observe_all(self):
+        """Redraw the whole observation from the simulation."""
+        sim = self.sim
+        grid = sim.grid
+        self.observation.fill(0)
+        for pos in sim.snake:
+            self.planes[BODY, grid.index(pos)] = 1
+        self.head_cell = grid.index(sim.head)
+        self.planes[HEAD, self.head_cell] = 1
+        self.food_cell = -1
+        self.power_up_cells = []
+        self.obstacles_version = None
+        self.timers = [0] * len(POWER_UP_TYPES)
+        self.observe_board()
+    
+    def observe_move(self, new_head, tail):
+        """Update the body and head for one move of the snake."""
+        grid = self.sim.grid
+        planes = self.planes
+        planes[HEAD, self.head_cell] = 0
+        self.head_cell = cell = grid.index(new_head)
+        planes[HEAD, cell] = 1
+        planes[BODY, cell] = 1
+        if tail is not None:
+            # An invincible snake may still cover its old tail cell
+            cell = grid.index(tail)
+            planes[BODY, cell] = 1 if grid.body[cell] else 0
+    
+    def observe_board(self):
+        """Update food, obstacles, power-ups and timers where they changed."""
+        sim = self.sim
+        grid = sim.grid
+        planes = self.planes
+        
+        food = grid.index(sim.food) if sim.food is not None else -1
+        if food != self.food_cell:
+            if self.food_cell >= 0:
+                planes[FOOD, self.food_cell] = 0
+            if food >= 0:
+                planes[FOOD, food] = 1
+            self.food_cell = food
+        
+        if sim.obstacles_version != self.obstacles_version:
+            planes[OBSTACLES] = 0
+            for obstacle in sim.obstacles:
+                planes[OBSTACLES, grid.index(obstacle.pos)] = 1
+            self.obstacles_version = sim.obstacles_version
+        
+        # Only a handful of power-ups are ever on the board
+        for channel, cell in self.power_up_cells:
+            planes[channel, cell] = 0
+        self.power_up_cells.clear()
+        for power_up in sim.power_ups:
+            channel = POWER_UPS + POWER_UP_TYPES.index(power_up.type)
+            cell = grid.index(power_up.pos)
+            planes[channel, cell] = 1
+            self.power_up_cells.append((channel, cell))
+        
+        for k, power_type in enumerate(POWER_UP_TYPES):
+            remaining = sim.active_power_ups.get(power_type, 0)
+            if remaining != self.timers[k]:
+                planes[TIMERS + k] = remaining / DURATIONS[k]
+                self.timers[k] = remaining
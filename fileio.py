@@ -0,0 +1,23 @@
+"""Crash-safe file writes shared by the score store, replays and disk caches."""
+import os
+
+def write_atomic(path, data):
+    """Replace path with data (bytes), never leaving a torn or empty file.
+    
+    The data goes to a temporary file next to path and is synced to disk
+    before being renamed over path, so after a crash or power loss readers
+    see either the old contents or the new ones. Raises OSError on failure.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -1,119 +1,72 @@
 import pygame
-import random
 import math
-import json
 import os
-from enum import Enum
-import numpy as np
+import threading
+from itertools import islice
+import sim
+import synth
+from particles import ParticleSystem
+from profiler import Profiler
+from sprites import SpriteAtlas
+from text_cache import render_text, load_font
+from replay import Replay, save_replay
+from scores import ScoreStore
+from sim import Direction, OPPOSITE, PowerUpType, GameMode, SnakeSim, TICK_RATE
 
-class Direction(Enum):
-    UP = (0, -1)
-    DOWN = (0, 1)
-    LEFT = (-1, 0)
-    RIGHT = (1, 0)
+# Most simulation ticks run per update() before a slow frame drops time
+MAX_STEPS_PER_FRAME = 8
 
-class PowerUpType(Enum):
-    SPEED_BOOST = "speed_boost"
-    SCORE_MULTIPLIER = "score_multiplier"
-    INVINCIBILITY = "invincibility"
-    GHOST_MODE = "ghost_mode"
-    DOUBLE_FOOD = "double_food"
-    SLOW_TIME = "slow_time"
+# Power-up colors
+POWER_UP_COLORS = {
+    PowerUpType.SPEED_BOOST: (255, 255, 0),      # Yellow
+    PowerUpType.SCORE_MULTIPLIER: (255, 0, 255),  # Magenta
+    PowerUpType.INVINCIBILITY: (0, 255, 255),     # Cyan
+    PowerUpType.GHOST_MODE: (128, 128, 128),      # Gray
+    PowerUpType.DOUBLE_FOOD: (255, 128, 0),       # Orange
+    PowerUpType.SLOW_TIME: (128, 0, 255)          # Purple
+}
 
-class GameMode(Enum):
-    CLASSIC = "classic"
-    SURVIVAL = "survival"
-    TIME_ATTACK = "time_attack"
+# (head, body) colors for each snake style
+SNAKE_COLORS = {
+    "normal": ((0, 255, 0), (0, 200, 0)),
+    "invincible": ((0, 255, 255), (0, 200, 200)),  # Cyan when invincible
+    "ghost": ((128, 128, 128), (100, 100, 100))    # Gray when in ghost mode
+}
 
-class Particle:
-    def __init__(self, x, y, color, velocity, lifetime):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.velocity = velocity
-        self.lifetime = lifetime
-        self.max_lifetime = lifetime
-        self.size = random.randint(2, 5)
-    
-    def update(self):
-        self.x += self.velocity[0]
-        self.y += self.velocity[1]
-        self.lifetime -= 1
-        self.velocity = (self.velocity[0] * 0.95, self.velocity[1] * 0.95)
-        return self.lifetime > 0
-    
-    def render(self, screen):
-        alpha = int(255 * (self.lifetime / self.max_lifetime))
-        color = (*self.color, alpha)
-        size = int(self.size * (self.lifetime / self.max_lifetime))
-        if size > 0:
-            surf = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
-            pygame.draw.circle(surf, color, (size, size), size)
-            screen.blit(surf, (self.x - size, self.y - size))
-
-class PowerUp:
-    def __init__(self, pos, power_type):
-        self.pos = pos
-        self.type = power_type
-        self.animation_time = 0
-        self.lifetime = 300  # 5 seconds at 60 FPS
-        
-        # Power-up colors
-        self.colors = {
-            PowerUpType.SPEED_BOOST: (255, 255, 0),      # Yellow
-            PowerUpType.SCORE_MULTIPLIER: (255, 0, 255),  # Magenta
-            PowerUpType.INVINCIBILITY: (0, 255, 255),     # Cyan
-            PowerUpType.GHOST_MODE: (128, 128, 128),      # Gray
-            PowerUpType.DOUBLE_FOOD: (255, 128, 0),       # Orange
-            PowerUpType.SLOW_TIME: (128, 0, 255)          # Purple
-        }
-    
-    def update(self):
-        self.animation_time += 0.2
-        self.lifetime -= 1
-        return self.lifetime > 0
-    
-    def render(self, screen, grid_size):
+class PowerUp(sim.PowerUp):
+    colors = POWER_UP_COLORS
+    
+    def render(self, screen, atlas, alpha=0.0):
+        """Draw the pulsing power-up and its glow. Returns the drawn rect.
+        
+        alpha is the fraction of a tick elapsed since the last update.
+        """
         x, y = self.pos
-        color = self.colors[self.type]
+        grid_size = atlas.grid_size
         
         # Pulsing effect
-        pulse = abs(math.sin(self.animation_time)) * 0.3 + 0.7
+        pulse = abs(math.sin(self.animation_time + 0.2 * alpha)) * 0.3 + 0.7
         size = int(grid_size * pulse)
         
-        # Draw power-up
-        rect = pygame.Rect(
-            x * grid_size + (grid_size - size) // 2,
-            y * grid_size + (grid_size - size) // 2,
-            size, size
-        )
-        pygame.draw.rect(screen, color, rect, border_radius=size // 4)
-        
-        # Draw glow effect
-        glow_size = int(size * 1.5)
-        glow_rect = pygame.Rect(
-            x * grid_size + (grid_size - glow_size) // 2,
-            y * grid_size + (grid_size - glow_size) // 2,
-            glow_size, glow_size
-        )
-        glow_surf = pygame.Surface((glow_size, glow_size), pygame.SRCALPHA)
-        glow_color = (*color, 50)
-        pygame.draw.rect(glow_surf, glow_color, glow_surf.get_rect(), border_radius=glow_size // 4)
-        screen.blit(glow_surf, glow_rect)
+        sprite, (dx, dy) = atlas.power_up(self.colors[self.type], size)
+        return screen.blit(sprite, (x * grid_size + dx, y * grid_size + dy))
 
-class Obstacle:
-    def __init__(self, pos):
-        self.pos = pos
-        self.color = (139, 69, 19)  # Brown
+class Obstacle(sim.Obstacle):
+    color = (139, 69, 19)  # Brown
+    border_color = (101, 67, 33)  # Darker border
     
-    def render(self, screen, grid_size):
+    def render(self, screen, atlas):
         x, y = self.pos
-        rect = pygame.Rect(x * grid_size, y * grid_size, grid_size, grid_size)
-        pygame.draw.rect(screen, self.color, rect)
-        pygame.draw.rect(screen, (101, 67, 33), rect, 2)  # Darker border
+        sprite = atlas.tile(self.color, self.border_color, 2)
+        screen.blit(sprite, (x * atlas.grid_size, y * atlas.grid_size))
+
+class GameSim(SnakeSim):
+    """SnakeSim that spawns the renderable PowerUp and Obstacle classes."""
+    power_up_class = PowerUp
+    obstacle_class = Obstacle
 
 class SnakeGame:
-    def __init__(self, screen):
+    def __init__(self, screen, dirty_rects=False, scores=None, profiler=None):
         self.screen = screen
         self.width, self.height = screen.get_size()
         
@@ -132,29 +85,110 @@ class SnakeGame:
         self.GRAY = (128, 128, 128)
         self.GOLD = (255, 215, 0)
         
-        # Initialize pygame mixer for sound
-        pygame.mixer.init()
-        
-        # Load sounds (create placeholder sounds if files don't exist)
+        # Sounds are set up on a background thread so starting a game never
+        # waits on the mixer or synthesis; play_sound skips any not ready yet
         self.sounds = {}
-        self.load_sounds()
-        
-        # Game state
-        self.game_mode = GameMode.CLASSIC
-        self.level = 1
-        self.time_left = 60  # For time attack mode
-        self.particles = []
-        self.power_ups = []
-        self.obstacles = []
-        self.active_power_ups = {}
-        self.high_scores = self.load_high_scores()
+        self.audio_thread = threading.Thread(target=self.init_audio, daemon=True)
+        self.audio_thread.start()
+        
+        # Game state lives in the headless simulation
+        self.particles = ParticleSystem()
+        self.pending_action = None
+        self.scores = scores if scores is not None else ScoreStore()
+        self.profiler = profiler if profiler is not None else Profiler(enabled=False)
+        self.sim = GameSim(self.grid_width, self.grid_height)
+        
+        # Every game is recorded as its seed plus direction changes
+        self.replay = None
+        self.last_replay_id = None
+        
+        # Layers drawn under the snake, food, power-ups and particles
+        self.background = pygame.Surface((self.width, self.height), 0, screen)
+        self.background_version = None
+        
+        # Every tile and power-up pulse frame, rendered once up front
+        self.atlas = SpriteAtlas(self.grid_size)
+        tiles = [(self.RED, self.BLACK, 1, 3), (Obstacle.color, Obstacle.border_color, 2)]
+        for head_color, body_color in SNAKE_COLORS.values():
+            tiles.append((head_color, self.BLACK, 1, 3))
+            tiles.append((body_color, self.BLACK, 1, 3))
+        self.atlas.prebuild(tiles, POWER_UP_COLORS.values())
+        
+        # Dirty-rect mode keeps the board, snake and food on a persistent
+        # world layer and only pushes the screen areas that changed
+        self.dirty_rects = dirty_rects
+        self.world = pygame.Surface((self.width, self.height), 0, screen) if dirty_rects else None
+        self.world_valid = False
+        self.world_style = None
+        self.drawn_head = None
+        self.drawn_food = None
+        self.changed_cells = []
+        self.overlay_rects = []
         
         self.reset()
         
         # Font
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
-        self.large_font = pygame.font.Font(None, 48)
+        self.font = load_font(36)
+        self.small_font = load_font(24)
+        self.large_font = load_font(48)
+    
+    # Read-only views of the simulation state used by rendering and main.py
+    @property
+    def game_mode(self):
+        return self.sim.game_mode
+    
+    @property
+    def snake(self):
+        return self.sim.snake
+    
+    @property
+    def food(self):
+        return self.sim.food
+    
+    @property
+    def obstacles(self):
+        return self.sim.obstacles
+    
+    @property
+    def power_ups(self):
+        return self.sim.power_ups
+    
+    @property
+    def active_power_ups(self):
+        return self.sim.active_power_ups
+    
+    @property
+    def score(self):
+        return self.sim.score
+    
+    @property
+    def level(self):
+        return self.sim.level
+    
+    @property
+    def speed(self):
+        return self.sim.speed
+    
+    @property
+    def score_multiplier(self):
+        return self.sim.score_multiplier
+    
+    @property
+    def time_left(self):
+        return self.sim.time_left
+    
+    @property
+    def game_over(self):
+        return self.sim.game_over
+    
+    def init_audio(self):
+        """Initialize the mixer and load the sounds (runs on a background thread)."""
+        try:
+            pygame.mixer.init()
+        except pygame.error:
+            # No audio device: the game runs silently
+            return
+        self.load_sounds()
     
     def load_sounds(self):
         """Load sound effects (create if they don't exist)."""
@@ -173,101 +207,31 @@ class SnakeGame:
         # Create level up sound (triumphant chord)
         self.sounds['level_up'] = self.create_level_up_sound()
     
-    def create_beep_sound(self, frequency, duration):
-        """Create a simple beep sound."""
+    def make_sound(self, name, *params):
+        """Build a pygame Sound from (cached) synthesized samples."""
         try:
-            sample_rate = 22050
-            frames = int(duration * sample_rate)
-            arr = np.zeros((frames, 2), dtype=np.int16)
-            for i in range(frames):
-                wave = int(4096 * math.sin(2 * math.pi * frequency * i / sample_rate))
-                arr[i] = [wave, wave]
-            sound = pygame.sndarray.make_sound(arr)
-            return sound
-        except:
+            return pygame.sndarray.make_sound(synth.render(name, *params))
+        except (pygame.error, ValueError):
             return None
     
+    def create_beep_sound(self, frequency, duration):
+        """Create a simple beep sound."""
+        return self.make_sound('beep', frequency, duration)
+    
     def create_power_up_sound(self):
         """Create a power-up sound effect."""
-        try:
-            sample_rate = 22050
-            duration = 0.3
-            frames = int(duration * sample_rate)
-            arr = np.zeros((frames, 2), dtype=np.int16)
-            
-            # Ascending notes
-            frequencies = [440, 554, 659, 880]  # A4, C#5, E5, A5
-            frames_per_note = frames // len(frequencies)
-            
-            for freq_idx, frequency in enumerate(frequencies):
-                for i in range(frames_per_note):
-                    progress = i / frames_per_note
-                    amplitude = 2048 * (1 - progress)  # Fade out
-                    wave = int(amplitude * math.sin(2 * math.pi * frequency * (freq_idx * frames_per_note + i) / sample_rate))
-                    if freq_idx * frames_per_note + i < frames:
-                        arr[freq_idx * frames_per_note + i] = [wave, wave]
-            
-            sound = pygame.sndarray.make_sound(arr)
-            return sound
-        except:
-            return None
+        # Ascending notes: A4, C#5, E5, A5, each fading out
+        return self.make_sound('sequence', (440, 554, 659, 880), 0.3, 2048, 1)
     
     def create_game_over_sound(self):
         """Create a game over sound effect."""
-        try:
-            sample_rate = 22050
-            duration = 0.5
-            frames = int(duration * sample_rate)
-            arr = np.zeros((frames, 2), dtype=np.int16)
-            
-            # Descending notes
-            frequencies = [440, 370, 294, 220]  # A4, F#4, D4, A3
-            frames_per_note = frames // len(frequencies)
-            
-            for freq_idx, frequency in enumerate(frequencies):
-                for i in range(frames_per_note):
-                    progress = i / frames_per_note
-                    amplitude = 3072 * (1 - progress * 0.5)  # Gradual fade
-                    wave = int(amplitude * math.sin(2 * math.pi * frequency * (freq_idx * frames_per_note + i) / sample_rate))
-                    if freq_idx * frames_per_note + i < frames:
-                        arr[freq_idx * frames_per_note + i] = [wave, wave]
-            
-            sound = pygame.sndarray.make_sound(arr)
-            return sound
-        except:
-            return None
+        # Descending notes: A4, F#4, D4, A3 with a gradual fade
+        return self.make_sound('sequence', (440, 370, 294, 220), 0.5, 3072, 0.5)
     
     def create_level_up_sound(self):
         """Create a level up sound effect."""
-        try:
-            sample_rate = 22050
-            duration = 0.4
-            frames = int(duration * sample_rate)
-            arr = np.zeros((frames, 2), dtype=np.int16)
-            
-            # Triumphant chord progression
-            chord1 = [262, 330, 392]  # C major
-            chord2 = [294, 370, 440]  # D major
-            
-            for i in range(frames):
-                progress = i / frames
-                if progress < 0.5:
-                    # First chord
-                    wave = 0
-                    for freq in chord1:
-                        wave += 1024 * math.sin(2 * math.pi * freq * i / sample_rate)
-                else:
-                    # Second chord
-                    wave = 0
-                    for freq in chord2:
-                        wave += 1024 * math.sin(2 * math.pi * freq * i / sample_rate)
-                
-                arr[i] = [int(wave), int(wave)]
-            
-            sound = pygame.sndarray.make_sound(arr)
-            return sound
-        except:
-            return None
+        # Triumphant chord progression: C major then D major
+        return self.make_sound('chords', ((262, 330, 392), (294, 370, 440)), 0.4, 1024)
     
     def play_sound(self, sound_name):
         """Play a sound effect."""
@@ -278,357 +242,317 @@ class SnakeGame:
             # Ignore sound errors if audio system is not available
             pass
     
-    def load_high_scores(self):
-        """Load high scores from file."""
-        try:
-            with open('high_scores.json', 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {mode.value: [] for mode in GameMode}
-    
-    def save_high_scores(self):
-        """Save high scores to file."""
-        with open('high_scores.json', 'w') as f:
-            json.dump(self.high_scores, f)
-    
     def add_high_score(self, score):
         """Add a new high score."""
-        mode_scores = self.high_scores[self.game_mode.value]
-        mode_scores.append(score)
-        mode_scores.sort(reverse=True)
-        self.high_scores[self.game_mode.value] = mode_scores[:10]  # Keep top 10
-        self.save_high_scores()
+        self.scores.add(self.game_mode, score, level=self.level, length=len(self.snake),
+                        duration=round(self.sim.tick / TICK_RATE, 2),
+                        replay=self.last_replay_id)
     
     def reset(self):
         """Reset the game to initial state."""
-        # Snake starts in the middle
-        self.snake = [(self.grid_width // 2, self.grid_height // 2)]
-        self.direction = Direction.RIGHT
-        self.next_direction = Direction.RIGHT
-        
-        # Food
-        self.food = self.generate_food()
-        
-        # Game state
-        self.score = 0
-        self.game_over = False
-        self.speed = 8  # Initial speed
-        self.last_update = 0
-        self.score_multiplier = 1
+        self.sim.reset()
+        self.replay = Replay.start(self.sim)
+        self.pending_action = None
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.invalidate()
         
         # Clear effects
-        self.particles = []
-        self.power_ups = []
-        self.active_power_ups = {}
-        
-        # Generate level obstacles
-        self.generate_obstacles()
-        
-        # Reset time for time attack mode
-        if self.game_mode == GameMode.TIME_ATTACK:
-            self.time_left = 60
-    
-    def generate_obstacles(self):
-        """Generate obstacles based on current level and game mode."""
-        self.obstacles = []
-        
-        if self.game_mode == GameMode.SURVIVAL:
-            # In survival mode, add more obstacles as score increases
-            num_obstacles = min(self.score // 50, 15)
-        elif self.game_mode == GameMode.CLASSIC:
-            # In classic mode, add obstacles based on level
-            num_obstacles = min(self.level - 1, 10) if self.level > 1 else 0
-        else:
-            # Time attack mode has fewer obstacles
-            num_obstacles = min(self.level // 2, 5) if self.level > 2 else 0
-        
-        for _ in range(num_obstacles):
-            attempts = 0
-            while attempts < 50:  # Prevent infinite loop
-                pos = (random.randint(1, self.grid_width - 2), 
-                       random.randint(1, self.grid_height - 2))
-                if (pos not in self.snake and pos != self.food and 
-                    pos not in [obs.pos for obs in self.obstacles]):
-                    self.obstacles.append(Obstacle(pos))
-                    break
-                attempts += 1
-    
-    def generate_food(self):
-        """Generate food at a random position."""
-        while True:
-            food_pos = (
-                random.randint(0, self.grid_width - 1),
-                random.randint(0, self.grid_height - 1)
-            )
-            if (food_pos not in self.snake and 
-                food_pos not in [obs.pos for obs in self.obstacles]):
-                return food_pos
-    
-    def spawn_power_up(self):
-        """Randomly spawn a power-up."""
-        if random.random() < 0.1:  # 10% chance
-            power_type = random.choice(list(PowerUpType))
-            while True:
-                pos = (random.randint(0, self.grid_width - 1),
-                       random.randint(0, self.grid_height - 1))
-                if (pos not in self.snake and pos != self.food and
-                    pos not in [obs.pos for obs in self.obstacles] and
-                    pos not in [pu.pos for pu in self.power_ups]):
-                    self.power_ups.append(PowerUp(pos, power_type))
-                    break
-    
-    def apply_power_up(self, power_type):
-        """Apply a power-up effect."""
-        self.play_sound('power_up')
-        
-        if power_type == PowerUpType.SPEED_BOOST:
-            self.active_power_ups[power_type] = 300  # 5 seconds
-            self.speed = min(self.speed + 5, 25)
-        elif power_type == PowerUpType.SCORE_MULTIPLIER:
-            self.active_power_ups[power_type] = 600  # 10 seconds
-            self.score_multiplier = 2
-        elif power_type == PowerUpType.INVINCIBILITY:
-            self.active_power_ups[power_type] = 300  # 5 seconds
-        elif power_type == PowerUpType.GHOST_MODE:
-            self.active_power_ups[power_type] = 300  # 5 seconds
-        elif power_type == PowerUpType.DOUBLE_FOOD:
-            self.active_power_ups[power_type] = 600  # 10 seconds
-        elif power_type == PowerUpType.SLOW_TIME:
-            self.active_power_ups[power_type] = 300  # 5 seconds
-            self.speed = max(self.speed - 3, 3)
-    
-    def update_power_ups(self):
-        """Update active power-ups."""
-        expired = []
-        for power_type, duration in self.active_power_ups.items():
-            duration -= 1
-            if duration <= 0:
-                expired.append(power_type)
-                # Remove effects
-                if power_type == PowerUpType.SPEED_BOOST:
-                    self.speed = max(self.speed - 5, 8)
-                elif power_type == PowerUpType.SCORE_MULTIPLIER:
-                    self.score_multiplier = 1
-                elif power_type == PowerUpType.SLOW_TIME:
-                    self.speed = min(self.speed + 3, 20)
-            else:
-                self.active_power_ups[power_type] = duration
-        
-        for power_type in expired:
-            del self.active_power_ups[power_type]
+        self.particles.clear()
     
     def create_particles(self, pos, color, count=10):
         """Create particle effects."""
         x, y = pos
         center_x = x * self.grid_size + self.grid_size // 2
         center_y = y * self.grid_size + self.grid_size // 2
-        
-        for _ in range(count):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(2, 8)
-            velocity = (math.cos(angle) * speed, math.sin(angle) * speed)
-            lifetime = random.randint(15, 30)
-            self.particles.append(Particle(center_x, center_y, color, velocity, lifetime))
+        self.particles.emit(center_x, center_y, color, count)
     
     def handle_event(self, event):
         """Handle keyboard events for snake direction."""
         if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_UP and self.direction != Direction.DOWN:
-                self.next_direction = Direction.UP
-            elif event.key == pygame.K_DOWN and self.direction != Direction.UP:
-                self.next_direction = Direction.DOWN
-            elif event.key == pygame.K_LEFT and self.direction != Direction.RIGHT:
-                self.next_direction = Direction.LEFT
-            elif event.key == pygame.K_RIGHT and self.direction != Direction.LEFT:
-                self.next_direction = Direction.RIGHT
-    
-    def update(self):
-        """Update game state. Returns True if game over."""
-        if self.game_over:
+            if event.key == pygame.K_UP:
+                self.pending_action = Direction.UP
+            elif event.key == pygame.K_DOWN:
+                self.pending_action = Direction.DOWN
+            elif event.key == pygame.K_LEFT:
+                self.pending_action = Direction.LEFT
+            elif event.key == pygame.K_RIGHT:
+                self.pending_action = Direction.RIGHT
+    
+    def update(self, dt=None):
+        """Advance the game by dt seconds of wall time. Returns True if game over.
+        
+        The simulation runs at a fixed TICK_RATE: elapsed time accumulates and
+        is spent in whole ticks, at most MAX_STEPS_PER_FRAME per call (any
+        larger backlog is dropped rather than spiralling). With dt=None a
+        single tick is run.
+        """
+        if self.sim.game_over:
             return True
         
-        # Update time for time attack mode
-        if self.game_mode == GameMode.TIME_ATTACK:
-            self.time_left -= 1/60  # Assuming 60 FPS
-            if self.time_left <= 0:
-                self.game_over = True
-                return True
-        
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_update < 1000 // self.speed:
-            # Update particles and power-ups even when snake isn't moving
-            self.particles = [p for p in self.particles if p.update()]
-            self.power_ups = [pu for pu in self.power_ups if pu.update()]
-            self.update_power_ups()
-            return False
-        
-        self.last_update = current_time
-        
-        # Update direction
-        self.direction = self.next_direction
-        
-        # Get new head position
-        head_x, head_y = self.snake[0]
-        dx, dy = self.direction.value
-        new_head = (head_x + dx, head_y + dy)
-        
-        # Check for wall collisions (unless in ghost mode)
-        if PowerUpType.GHOST_MODE not in self.active_power_ups:
-            if (new_head[0] < 0 or new_head[0] >= self.grid_width or
-                new_head[1] < 0 or new_head[1] >= self.grid_height):
-                self.game_over = True
-                self.play_sound('game_over')
-                self.add_high_score(self.score)
-                return True
+        if dt is None:
+            steps = 1
         else:
-            # Wrap around in ghost mode
-            new_head = (new_head[0] % self.grid_width, new_head[1] % self.grid_height)
-        
-        # Check for self collision (unless invincible)
-        if (PowerUpType.INVINCIBILITY not in self.active_power_ups and 
-            new_head in self.snake):
-            self.game_over = True
-            self.play_sound('game_over')
-            self.add_high_score(self.score)
-            return True
+            self.accumulator += dt
+            steps = int(self.accumulator * TICK_RATE + 1e-9)  # Absorb float error
+            if steps > MAX_STEPS_PER_FRAME:
+                steps = MAX_STEPS_PER_FRAME
+                self.accumulator = 0.0
+            else:
+                self.accumulator -= steps / TICK_RATE
         
-        # Check for obstacle collision (unless invincible)
-        if (PowerUpType.INVINCIBILITY not in self.active_power_ups and
-            any(new_head == obs.pos for obs in self.obstacles)):
-            self.game_over = True
-            self.play_sound('game_over')
-            self.add_high_score(self.score)
-            return True
+        for _ in range(steps):
+            self.tick()
+            if self.sim.game_over:
+                break
         
-        # Move snake
-        self.snake.insert(0, new_head)
-        
-        # Check if food is eaten
-        if new_head == self.food:
-            points = 10 * self.score_multiplier
-            if PowerUpType.DOUBLE_FOOD in self.active_power_ups:
-                points *= 2
-            self.score += points
-            self.create_particles(self.food, self.RED, 15)
-            self.play_sound('eat')
-            self.food = self.generate_food()
-            
-            # Increase speed and level
-            if self.score % 100 == 0:
-                self.speed = min(self.speed + 1, 25)
-                self.level += 1
-                self.generate_obstacles()
+        # How far we are between the last tick and the next, for rendering
+        self.alpha = max(0.0, min(self.accumulator * TICK_RATE, 1.0))
+        return self.sim.game_over
+    
+    def tick(self):
+        """Run one simulation tick and react to its events."""
+        action = self.pending_action
+        self.pending_action = None
+        
+        # Only record inputs that actually change the snake's course
+        if (action is not None and action != self.sim.next_direction and
+            action != OPPOSITE[self.sim.direction]):
+            self.replay.record(self.sim.tick, action)
+        
+        with self.profiler.span("sim.step"):
+            events = self.sim.step(action)
+        
+        for event in events:
+            kind = event[0]
+            if kind == "move":
+                if self.dirty_rects:
+                    self.changed_cells.append(event[1])
+                    if event[2] is not None:
+                        self.changed_cells.append(event[2])
+            elif kind == "eat":
+                self.create_particles(event[1], self.RED, 15)
+                self.play_sound('eat')
+            elif kind == "level_up":
                 self.play_sound('level_up')
-            
-            # Spawn power-up occasionally
-            self.spawn_power_up()
-        else:
-            self.snake.pop()
-        
-        # Check for power-up collection
-        for power_up in self.power_ups[:]:
-            if new_head == power_up.pos:
-                self.power_ups.remove(power_up)
-                self.apply_power_up(power_up.type)
+            elif kind == "power_up":
+                power_up = event[1]
+                self.play_sound('power_up')
                 self.create_particles(power_up.pos, power_up.colors[power_up.type], 20)
+            elif kind == "game_over":
+                self.save_replay()
+                self.add_high_score(self.score)
+                if event[1] != "time_up":
+                    self.play_sound('game_over')
         
-        # Update particles and power-ups
-        self.particles = [p for p in self.particles if p.update()]
-        self.power_ups = [pu for pu in self.power_ups if pu.update()]
-        self.update_power_ups()
-        
-        return False
+        # Update particles
+        with self.profiler.span("particles.update"):
+            self.particles.update()
+    
+    def save_replay(self):
+        """Save the finished game's replay and remember its id."""
+        self.replay.finish(self.sim)
+        try:
+            self.last_replay_id = save_replay(self.replay)
+        except OSError:
+            # Replays are optional; don't interrupt the game over them
+            self.last_replay_id = None
+    
+    def invalidate(self):
+        """Force the next dirty-rect render to redraw the whole screen."""
+        self.world_valid = False
     
     def render(self):
-        """Render the game."""
-        # Clear screen
-        self.screen.fill(self.BLACK)
-        
-        # Draw obstacles
-        for obstacle in self.obstacles:
-            obstacle.render(self.screen, self.grid_size)
-        
-        # Draw snake with special effects
-        for i, segment in enumerate(self.snake):
-            if i == 0:  # Head
-                color = self.GREEN
-                if PowerUpType.INVINCIBILITY in self.active_power_ups:
-                    color = (0, 255, 255)  # Cyan when invincible
-                elif PowerUpType.GHOST_MODE in self.active_power_ups:
-                    color = (128, 128, 128)  # Gray when in ghost mode
-            else:  # Body
-                color = self.DARK_GREEN
-                if PowerUpType.INVINCIBILITY in self.active_power_ups:
-                    color = (0, 200, 200)
-                elif PowerUpType.GHOST_MODE in self.active_power_ups:
-                    color = (100, 100, 100)
+        """Render the game.
+        
+        Returns the list of screen rects that changed in dirty-rect mode,
+        or None when the whole screen was redrawn and should be flipped.
+        """
+        if self.dirty_rects:
+            return self.render_dirty()
+        
+        with self.profiler.span("board"):
+            # Static layer: board and obstacles, rebuilt only when the layout changes
+            if self.background_version != self.sim.obstacles_version:
+                self.build_background()
+            self.screen.blit(self.background, (0, 0))
             
-            self.draw_rect(segment, color)
-        
-        # Draw food
-        self.draw_rect(self.food, self.RED)
+            # Draw snake with special effects
+            self.draw_snake(self.screen)
+            
+            # Draw food
+            if self.food is not None:
+                self.draw_rect(self.food, self.RED)
         
         # Draw power-ups
-        for power_up in self.power_ups:
-            power_up.render(self.screen, self.grid_size)
+        with self.profiler.span("power_ups"):
+            for power_up in self.power_ups:
+                power_up.render(self.screen, self.atlas, self.alpha)
         
         # Draw particles
-        for particle in self.particles:
-            particle.render(self.screen)
+        with self.profiler.span("particles"):
+            self.particles.render(self.screen, self.alpha)
         
         # Draw HUD
-        self.draw_hud()
+        with self.profiler.span("hud"):
+            self.draw_hud()
+    
+    def render_dirty(self):
+        """Render only what changed since the last frame."""
+        with self.profiler.span("board"):
+            dirty = self.repaint_world()
+        
+        # Overlays are redrawn every frame straight onto the screen
+        overlay = []
+        with self.profiler.span("power_ups"):
+            for power_up in self.power_ups:
+                overlay.append(power_up.render(self.screen, self.atlas, self.alpha))
+        with self.profiler.span("particles"):
+            particle_rect = self.particles.render(self.screen, self.alpha)
+        if particle_rect is not None:
+            overlay.append(particle_rect)
+        with self.profiler.span("hud"):
+            overlay.extend(self.draw_hud())
+        
+        dirty.extend(overlay)
+        self.overlay_rects = overlay
+        screen_rect = self.screen.get_rect()
+        return [rect.clip(screen_rect) for rect in dirty]
+    
+    def repaint_world(self):
+        """Bring the world layer and its part of the screen up to date.
+        
+        Returns the screen rects that were repainted.
+        """
+        style = self.snake_style()
+        full = (not self.world_valid or self.world_style != style or
+                self.background_version != self.sim.obstacles_version)
+        
+        if full:
+            # Rebuild the world layer from scratch and push the whole screen
+            if self.background_version != self.sim.obstacles_version:
+                self.build_background()
+            self.world.blit(self.background, (0, 0))
+            self.draw_snake(self.world)
+            if self.food is not None:
+                self.draw_rect(self.food, self.RED, self.world)
+            self.world_valid = True
+            self.world_style = style
+            self.screen.blit(self.world, (0, 0))
+            dirty = [self.screen.get_rect()]
+        else:
+            # Repaint cells the snake entered or left, the previous head
+            # (now body), and old/new food, then restore last frame's overlays
+            cells = set(self.changed_cells)
+            cells.add(self.drawn_head)
+            cells.add(self.sim.head)
+            cells.add(self.drawn_food)
+            cells.add(self.food)
+            cells.discard(None)
+            dirty = [self.redraw_cell(cell) for cell in cells]
+            dirty.extend(self.overlay_rects)
+            for rect in dirty:
+                self.screen.blit(self.world, rect, rect)
+        
+        self.changed_cells = []
+        self.drawn_head = self.sim.head
+        self.drawn_food = self.food
+        return dirty
+    
+    def redraw_cell(self, pos):
+        """Repaint one grid cell of the world layer from the current state."""
+        rect = pygame.Rect(pos[0] * self.grid_size, pos[1] * self.grid_size,
+                           self.grid_size, self.grid_size)
+        self.world.blit(self.background, rect, rect)
+        head_color, body_color = SNAKE_COLORS[self.world_style]
+        segments = self.sim.grid.body[self.sim.grid.index(pos)]
+        # Body segments are drawn over the head, as in a full redraw
+        if pos == self.sim.head and segments == 1:
+            self.draw_rect(pos, head_color, self.world)
+        elif segments:
+            self.draw_rect(pos, body_color, self.world)
+        elif pos == self.food:
+            self.draw_rect(pos, self.RED, self.world)
+        return rect
+    
+    def build_background(self):
+        """Pre-render the board background and obstacles into one surface."""
+        self.background.fill(self.BLACK)
+        for obstacle in self.obstacles:
+            obstacle.render(self.background, self.atlas)
+        self.background_version = self.sim.obstacles_version
+    
+    def snake_style(self):
+        """Return the SNAKE_COLORS style for the active power-ups."""
+        if PowerUpType.INVINCIBILITY in self.active_power_ups:
+            return "invincible"
+        if PowerUpType.GHOST_MODE in self.active_power_ups:
+            return "ghost"
+        return "normal"
+    
+    def draw_snake(self, surface):
+        """Blit the whole snake in one batch, head first."""
+        head_color, body_color = SNAKE_COLORS[self.snake_style()]
+        head = self.atlas.tile(head_color, self.BLACK, 1, 3)
+        body = self.atlas.tile(body_color, self.BLACK, 1, 3)
+        g = self.grid_size
+        head_x, head_y = self.sim.head
+        batch = [(head, (head_x * g, head_y * g))]
+        batch.extend((body, (x * g, y * g)) for x, y in islice(self.snake, 1, None))
+        surface.blits(batch, False)
     
-    def draw_rect(self, pos, color):
+    def draw_rect(self, pos, color, surface=None):
         """Draw a rectangle at grid position."""
         x, y = pos
-        rect = pygame.Rect(
-            x * self.grid_size,
-            y * self.grid_size,
-            self.grid_size,
-            self.grid_size
-        )
-        pygame.draw.rect(self.screen, color, rect, border_radius=3)
-        pygame.draw.rect(self.screen, self.BLACK, rect, 1)  # Border
+        surface = surface or self.screen
+        sprite = self.atlas.tile(color, self.BLACK, 1, 3)  # Rounded, with border
+        surface.blit(sprite, (x * self.grid_size, y * self.grid_size))
     
     def draw_hud(self):
-        """Draw the heads-up display."""
+        """Draw the heads-up display. Returns the rects it drew into."""
+        rects = []
+        
         # Score
-        score_text = self.font.render(f"Score: {self.score}", True, self.WHITE)
-        self.screen.blit(score_text, (10, 10))
+        score_text = render_text(self.font, f"Score: {self.score}", self.WHITE)
+        rects.append(self.screen.blit(score_text, (10, 10)))
         
         # Level
-        level_text = self.font.render(f"Level: {self.level}", True, self.WHITE)
-        self.screen.blit(level_text, (10, 50))
+        level_text = render_text(self.font, f"Level: {self.level}", self.WHITE)
+        rects.append(self.screen.blit(level_text, (10, 50)))
         
         # Speed
-        speed_text = self.small_font.render(f"Speed: {self.speed}", True, self.WHITE)
-        self.screen.blit(speed_text, (10, 90))
+        speed_text = render_text(self.small_font, f"Speed: {self.speed}", self.WHITE)
+        rects.append(self.screen.blit(speed_text, (10, 90)))
         
         # Game mode
-        mode_text = self.small_font.render(f"Mode: {self.game_mode.value.title()}", True, self.WHITE)
-        self.screen.blit(mode_text, (10, 110))
+        mode_text = render_text(self.small_font, f"Mode: {self.game_mode.value.title()}", self.WHITE)
+        rects.append(self.screen.blit(mode_text, (10, 110)))
         
         # Time left for time attack mode
         if self.game_mode == GameMode.TIME_ATTACK:
-            time_text = self.font.render(f"Time: {int(self.time_left)}s", True, self.WHITE)
-            self.screen.blit(time_text, (self.width - 150, 10))
+            time_text = render_text(self.font, f"Time: {int(self.time_left)}s", self.WHITE)
+            rects.append(self.screen.blit(time_text, (self.width - 150, 10)))
         
         # Score multiplier
         if self.score_multiplier > 1:
-            mult_text = self.font.render(f"x{self.score_multiplier}", True, self.GOLD)
-            self.screen.blit(mult_text, (self.width - 100, 50))
+            mult_text = render_text(self.font, f"x{self.score_multiplier}", self.GOLD)
+            rects.append(self.screen.blit(mult_text, (self.width - 100, 50)))
         
         # Active power-ups
         y_offset = 130
         for power_type in self.active_power_ups:
             duration = self.active_power_ups[power_type]
-            power_text = self.small_font.render(f"{power_type.value.replace('_', ' ').title()}: {duration//60}s", True, self.WHITE)
-            self.screen.blit(power_text, (10, y_offset))
+            power_text = render_text(self.small_font, f"{power_type.value.replace('_', ' ').title()}: {duration // TICK_RATE}s", self.WHITE)
+            rects.append(self.screen.blit(power_text, (10, y_offset)))
             y_offset += 20
+        
+        return rects
     
     def render_game_over(self):
         """Render game over screen."""
+        # The overlay darkens the whole frame, so the next frame is redrawn fully
+        self.invalidate()
+        
         # Semi-transparent overlay
         overlay = pygame.Surface((self.width, self.height))
         overlay.set_alpha(128)
@@ -636,18 +560,20 @@ class SnakeGame:
         self.screen.blit(overlay, (0, 0))
         
         # Game over text
-        game_over_text = self.large_font.render("GAME OVER", True, self.RED)
-        score_text = self.font.render(f"Final Score: {self.score}", True, self.WHITE)
-        level_text = self.font.render(f"Level Reached: {self.level}", True, self.WHITE)
+        if self.sim.won:
+            game_over_text = render_text(self.large_font, "BOARD CLEARED!", self.GOLD)
+        else:
+            game_over_text = render_text(self.large_font, "GAME OVER", self.RED)
+        score_text = render_text(self.font, f"Final Score: {self.score}", self.WHITE)
+        level_text = render_text(self.font, f"Level Reached: {self.level}", self.WHITE)
         
         # High score
-        mode_scores = self.high_scores[self.game_mode.value]
-        if mode_scores:
-            high_score_text = self.font.render(f"High Score: {mode_scores[0]}", True, self.GOLD)
-        else:
-            high_score_text = self.font.render("High Score: 0", True, self.GOLD)
+        high_score = self.scores.best(self.game_mode)
+        high_score_text = render_text(self.font, f"High Score: {high_score}", self.GOLD)
         
-        restart_text = self.small_font.render("Press SPACE to restart or ENTER for menu", True, self.WHITE)
+        restart_text = render_text(self.small_font, "Press SPACE to restart or ENTER for menu", self.WHITE)
+        replay_id = self.last_replay_id or "not saved"
+        replay_text = render_text(self.small_font, f"Replay: {replay_id}", self.GRAY)
         
         # Center text
         y_center = self.height // 2
@@ -656,7 +582,8 @@ class SnakeGame:
             (score_text, y_center - 20),
             (level_text, y_center + 20),
             (high_score_text, y_center + 60),
-            (restart_text, y_center + 120)
+            (restart_text, y_center + 120),
+            (replay_text, y_center + 150)
         ]
         
         for text, y in texts:
@@ -665,5 +592,5 @@ class SnakeGame:
     
     def set_game_mode(self, mode):
         """Set the game mode."""
-        self.game_mode = mode
+        self.sim.game_mode = mode
         self.reset() 
\ No newline at end of file
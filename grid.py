@@ -0,0 +1,99 @@
+"""Occupancy index for the game board.
+
+OccupancyGrid keeps one entry per cell so collision checks and spawn
+placement are constant-time lookups instead of scans over the snake,
+obstacle and power-up lists. It also keeps the set of empty cells as a
+swap-remove array, so picking a random free cell costs O(1) however full
+the board is.
+"""
+from array import array
+
+# Cell flags
+OBSTACLE = 1
+FOOD = 2
+POWER_UP = 4
+
+class OccupancyGrid:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        
+        # Static contents as bit flags, snake segments as a count per cell
+        # (an invincible snake can pass over itself)
+        self.cells = bytearray(self.size)
+        self.body = array('H', bytes(2 * self.size))
+        
+        # Empty cell indices, and each cell's slot in that array (-1 if taken)
+        self.free = array('i', range(self.size))
+        self.slot = array('i', range(self.size))
+    
+    def clear(self):
+        """Empty every cell."""
+        self.cells[:] = bytes(self.size)
+        self.body[:] = array('H', bytes(2 * self.size))
+        self.free = array('i', range(self.size))
+        self.slot = array('i', range(self.size))
+    
+    def sync(self, i):
+        """Add or drop cell i from the free array after its contents changed."""
+        empty = self.body[i] == 0 and self.cells[i] == 0
+        slot = self.slot[i]
+        if empty and slot < 0:
+            self.slot[i] = len(self.free)
+            self.free.append(i)
+        elif not empty and slot >= 0:
+            # Swap the last free cell into this slot and shrink
+            last = self.free.pop()
+            if last != i:
+                self.free[slot] = last
+                self.slot[last] = slot
+            self.slot[i] = -1
+    
+    def free_count(self):
+        return len(self.free)
+    
+    def random_free(self, rng):
+        """Return a uniformly random empty cell, or None if the board is full."""
+        if not self.free:
+            return None
+        return self.position(self.free[rng.randrange(len(self.free))])
+    
+    def index(self, pos):
+        """Return the flat cell index for a grid position."""
+        return pos[1] * self.width + pos[0]
+    
+    def position(self, index):
+        """Return the grid position for a flat cell index."""
+        return (index % self.width, index // self.width)
+    
+    def add_body(self, pos):
+        i = pos[1] * self.width + pos[0]
+        self.body[i] += 1
+        self.sync(i)
+    
+    def remove_body(self, pos):
+        i = pos[1] * self.width + pos[0]
+        self.body[i] -= 1
+        self.sync(i)
+    
+    def has_body(self, pos):
+        return self.body[pos[1] * self.width + pos[0]] > 0
+    
+    def add(self, pos, flag):
+        i = pos[1] * self.width + pos[0]
+        self.cells[i] |= flag
+        self.sync(i)
+    
+    def remove(self, pos, flag):
+        i = pos[1] * self.width + pos[0]
+        self.cells[i] &= ~flag
+        self.sync(i)
+    
+    def has(self, pos, flag):
+        return self.cells[pos[1] * self.width + pos[0]] & flag != 0
+    
+    def is_free(self, pos, flags=OBSTACLE | FOOD | POWER_UP):
+        """Check that no snake segment and none of the given flags are in a cell."""
+        i = pos[1] * self.width + pos[0]
+        return self.body[i] == 0 and self.cells[i] & flags == 0
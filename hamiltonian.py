@@ -0,0 +1,195 @@
+"""Hamiltonian cycles over the game board, cached on disk.
+
+A Hamiltonian cycle visits every cell once and returns to its start, so a
+snake that follows it can never trap itself and will eventually fill the
+board. Boards with an even number of cells and no obstacles get a full
+back-and-forth cycle. Otherwise the board is split into 2x2 blocks, a
+spanning tree is grown over the blocks that are free of obstacles and the
+cycle runs around that tree; cells in blocked blocks (and the last row or
+column of an odd-sized board) are then left off the cycle. A cycle through
+every free cell around arbitrary obstacles is NP-hard to find in general.
+
+Cycle carries each cell's rank along the cycle, which turns distances along
+it into a subtraction and lets shortcut_safe() check that cutting across
+the cycle can't put the head behind its own tail.
+
+Cycles are cached in memory and under .cache/hamiltonian keyed by board size
+and obstacle layout, since generate_obstacles() repeats the same layouts for
+a given level and seed.
+"""
+import hashlib
+import os
+from array import array
+from collections import deque
+from fileio import write_atomic
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'hamiltonian')
+CACHE_VERSION = 1  # Bump when the construction changes its output
+
+cycles = {}  # cache key -> Cycle or None
+
+class Cycle:
+    def __init__(self, width, height, order):
+        self.width = width
+        self.height = height
+        self.order = array('i', order)  # Cell indices in cycle order
+        self.length = len(order)
+        
+        # Position of each cell along the cycle, -1 for cells off it
+        self.rank = array('i', [-1]) * (width * height)
+        for position, cell in enumerate(order):
+            self.rank[cell] = position
+    
+    def on_cycle(self, cell):
+        return self.rank[cell] >= 0
+    
+    def next_cell(self, cell):
+        """The cell after cell along the cycle."""
+        return self.order[(self.rank[cell] + 1) % self.length]
+    
+    def distance(self, a, b):
+        """Steps from cell a forward along the cycle to cell b."""
+        return (self.rank[b] - self.rank[a]) % self.length
+    
+    def shortcut_safe(self, head, cell, tail, snake_length, food=None):
+        """Check the head may jump from head to cell, which is on the cycle.
+        
+        The body must lie along the cycle from tail to head. The jump is
+        safe if cell is still ahead of the head and before the tail, with
+        room to spare for growth, and doesn't skip over the food. Long
+        snakes only ever take the next cell on the cycle.
+        """
+        ahead = self.distance(head, cell)
+        if ahead == 1:
+            return True
+        if snake_length * 2 > self.length:
+            return False
+        room = self.distance(head, tail) if snake_length > 1 else self.length
+        if ahead >= room - snake_length // 4 - 4:
+            return False
+        if food is not None and self.on_cycle(food) and ahead > self.distance(head, food):
+            return False
+        return True
+
+def serpentine_order(width, height):
+    """A full cycle over an obstacle-free board with an even row count."""
+    order = [x for x in range(width)]
+    for y in range(1, height):
+        xs = range(width - 1, 0, -1) if y % 2 else range(1, width)
+        order.extend(y * width + x for x in xs)
+    order.extend(y * width for y in range(height - 1, 0, -1))
+    return order
+
+def block_tree_order(width, height, blocked):
+    """A cycle around a spanning tree of the obstacle-free 2x2 blocks.
+    
+    Only the largest connected group of free blocks is covered. Returns an
+    empty list if there are no free blocks.
+    """
+    columns, rows = width // 2, height // 2
+    free = bytearray(columns * rows)
+    for b in range(columns * rows):
+        bx, by = 2 * (b % columns), 2 * (b // columns)
+        cells = (by * width + bx, by * width + bx + 1,
+                 (by + 1) * width + bx, (by + 1) * width + bx + 1)
+        free[b] = not any(cell in blocked for cell in cells)
+    
+    # Breadth-first spanning tree over each group of free blocks; keep the largest
+    group = array('i', [-1]) * (columns * rows)
+    best_edges, best_start, best_size = None, -1, 0
+    for start in range(columns * rows):
+        if not free[start] or group[start] >= 0:
+            continue
+        group[start] = start
+        edges = set()
+        frontier = deque([start])
+        size = 0
+        while frontier:
+            b = frontier.popleft()
+            size += 1
+            bx, by = b % columns, b // columns
+            for nx, ny in ((bx + 1, by), (bx, by + 1), (bx - 1, by), (bx, by - 1)):
+                if 0 <= nx < columns and 0 <= ny < rows:
+                    n = ny * columns + nx
+                    if free[n] and group[n] < 0:
+                        group[n] = start
+                        edges.add((min(b, n), max(b, n)))
+                        frontier.append(n)
+        if size > best_size:
+            best_edges, best_start, best_size = edges, start, size
+    if best_edges is None:
+        return []
+    
+    def linked(bx, by, nx, ny):
+        if not (0 <= nx < columns and 0 <= ny < rows):
+            return False
+        b, n = by * columns + bx, ny * columns + nx
+        return (min(b, n), max(b, n)) in best_edges
+    
+    # Go clockwise around each block, crossing into a neighbor wherever a
+    # tree edge joins them; this walks around the outside of the whole tree
+    def successor(x, y):
+        bx, by = x // 2, y // 2
+        corner = (x % 2, y % 2)
+        if corner == (0, 0):
+            return (x, y - 1) if linked(bx, by, bx, by - 1) else (x + 1, y)
+        if corner == (1, 0):
+            return (x + 1, y) if linked(bx, by, bx + 1, by) else (x, y + 1)
+        if corner == (1, 1):
+            return (x, y + 1) if linked(bx, by, bx, by + 1) else (x - 1, y)
+        return (x - 1, y) if linked(bx, by, bx - 1, by) else (x, y - 1)
+    
+    bx, by = 2 * (best_start % columns), 2 * (best_start // columns)
+    order = []
+    x, y = bx, by
+    for _ in range(4 * best_size):
+        order.append(y * width + x)
+        x, y = successor(x, y)
+    return order
+
+def build_cycle(width, height, blocked=()):
+    """Build a Cycle over the board avoiding the blocked cell indices.
+    
+    Returns None if the board has no room for a cycle at all.
+    """
+    blocked = set(blocked)
+    if width < 2 or height < 2:
+        return None
+    if not blocked and height % 2 == 0:
+        return Cycle(width, height, serpentine_order(width, height))
+    if not blocked and width % 2 == 0:
+        # Build it on the transposed board and map the cells back
+        order = [(cell % height) * width + cell // height
+                 for cell in serpentine_order(height, width)]
+        return Cycle(width, height, order)
+    order = block_tree_order(width, height, blocked)
+    return Cycle(width, height, order) if order else None
+
+def cache_path(width, height, blocked):
+    key = hashlib.sha1(repr((CACHE_VERSION, width, height, blocked)).encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{width}x{height}-{key[:16]}.bin")
+
+def load_cycle(width, height, blocked=()):
+    """Return the Cycle for this board and obstacle layout, using the caches."""
+    blocked = tuple(sorted(blocked))
+    key = (width, height, blocked)
+    if key in cycles:
+        return cycles[key]
+    
+    path = cache_path(width, height, blocked)
+    try:
+        with open(path, 'rb') as f:
+            order = array('i')
+            order.frombytes(f.read())
+        cycle = Cycle(width, height, order) if order else None
+    except (OSError, ValueError):
+        cycle = build_cycle(width, height, blocked)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # An empty file records that the board has no cycle
+            write_atomic(path, array('i', cycle.order if cycle else ()).tobytes())
+        except OSError:
+            # Can't write the cache directory: just don't cache
+            pass
+    cycles[key] = cycle
+    return cycle
@@ -1,11 +1,45 @@
+import time
+STARTED = time.perf_counter()  # For the time-to-first-menu-frame metric
+
+import argparse
+import json
 import pygame
 import sys
-from game import SnakeGame, GameMode
 from menu import Menu
+from scores import ScoreStore
+from profiler import Profiler
+from profiler_overlay import ProfilerOverlay
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Enhanced Snake Game")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only push changed screen areas during play "
+                             "(faster on software-rendered displays)")
+    parser.add_argument("--fps", type=int, default=60,
+                        help="frame rate cap; the game simulation always runs "
+                             "at a fixed tick rate (default: 60)")
+    parser.add_argument("--profile", action="store_true",
+                        help="show the frame-time overlay from the start (F3 toggles it)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="write per-frame timings to PATH (JSON lines, or CSV "
+                             "if PATH ends in .csv)")
+    parser.add_argument("--startup-metric", action="store_true",
+                        help="print the time to the first menu frame as JSON and exit")
+    return parser.parse_args(argv)
+
+def create_game(screen, args, scores, profiler):
+    """Build the game on first start; importing it pulls in NumPy and the sound synth."""
+    from game import SnakeGame
+    return SnakeGame(screen, dirty_rects=args.dirty_rects, scores=scores, profiler=profiler)
 
 def main():
     """Main function to run the snake game."""
-    pygame.init()
+    args = parse_args()
+    
+    # Only what the menu needs; the game starts the mixer itself when created
+    pygame.display.init()
+    pygame.font.init()
     
     # Set up display
     WINDOW_WIDTH = 800
@@ -13,9 +47,19 @@ def main():
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption("Enhanced Snake Game")
     
-    # Initialize game objects
-    game = SnakeGame(screen)
-    menu = Menu(screen)
+    # Frame-time profiling, shown with F3
+    profiler = Profiler()
+    if args.trace:
+        profiler.open_trace(args.trace)
+    overlay = ProfilerOverlay(profiler)
+    if args.profile:
+        overlay.toggle()
+    
+    # The menu and game share one high-score store; the game is created the
+    # first time one starts
+    scores = ScoreStore()
+    menu = Menu(screen, scores=scores)
+    game = None
     
     # Game state
     current_state = "menu"  # "menu", "game", "game_over"
@@ -23,54 +67,87 @@ def main():
     # Main game loop
     running = True
     clock = pygame.time.Clock()
+    dt = 0.0  # Seconds since the previous frame
     
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            
-            if current_state == "menu":
-                action, mode = menu.handle_event(event)
-                if action == "start_game":
-                    current_state = "game"
-                    game.set_game_mode(mode)
-                    game.reset()
-                elif action == "quit":
+        profiler.begin_frame()
+        
+        with profiler.span("events"):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
                     running = False
-            
-            elif current_state == "game":
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        current_state = "menu"
-                    else:
-                        game.handle_event(event)
-            
-            elif current_state == "game_over":
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_RETURN:
-                        current_state = "menu"
-                    elif event.key == pygame.K_SPACE:
+                
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    overlay.toggle()
+                    if game is not None:
+                        game.invalidate()  # Repaint the area the overlay covered
+                
+                if current_state == "menu":
+                    action, mode = menu.handle_event(event)
+                    if action == "start_game":
                         current_state = "game"
+                        if game is None:
+                            game = create_game(screen, args, scores, profiler)
+                        game.set_game_mode(mode)
                         game.reset()
+                    elif action == "quit":
+                        running = False
+                
+                elif current_state == "game":
+                    if event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_ESCAPE:
+                            current_state = "menu"
+                        else:
+                            game.handle_event(event)
+                
+                elif current_state == "game_over":
+                    if event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_RETURN:
+                            current_state = "menu"
+                        elif event.key == pygame.K_SPACE:
+                            current_state = "game"
+                            game.reset()
         
         # Update and render based on current state
+        dirty_rects = None  # None means flip the whole screen
         if current_state == "menu":
-            menu.update()
-            menu.render()
+            with profiler.span("menu.update"):
+                menu.update()
+            with profiler.span("menu.render"):
+                menu.render()
         
         elif current_state == "game":
-            game_over = game.update()
-            game.render()
+            with profiler.span("game.update"):
+                game_over = game.update(dt)
+            with profiler.span("game.render"):
+                dirty_rects = game.render()
             if game_over:
                 current_state = "game_over"
         
         elif current_state == "game_over":
-            game.render()
-            game.render_game_over()
+            with profiler.span("game_over.render"):
+                game.render()
+                game.render_game_over()
+        
+        overlay_rect = overlay.render(screen)
+        if overlay_rect is not None and dirty_rects is not None:
+            dirty_rects.append(overlay_rect)
+        
+        with profiler.span("display"):
+            if dirty_rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty_rects)
         
-        pygame.display.flip()
-        clock.tick(60)  # 60 FPS
+        profiler.end_frame(dt_ms=round(dt * 1000, 3))
+        if args.startup_metric:
+            elapsed = time.perf_counter() - STARTED
+            print(json.dumps({"first_menu_frame_ms": round(elapsed * 1000, 2)}))
+            running = False
+        dt = clock.tick(args.fps) / 1000
     
+    profiler.close_trace()
+    scores.close()
     pygame.quit()
     sys.exit()
 
@@ -1,6 +1,16 @@
 import pygame
 import math
-from game import GameMode
+from autopilot import Autopilot
+from sim import GameMode, SnakeSim
+from text_cache import render_text, load_font
+from scores import ScoreStore
+
+# Number of pre-rendered title glow intensities
+TITLE_GLOW_LEVELS = 32
+
+# Attract-mode board cell size in pixels, and the length at which it restarts
+DEMO_CELL_SIZE = 20
+DEMO_MAX_LENGTH = 60
 
 class Button:
     def __init__(self, x, y, width, height, text, color, hover_color):
@@ -9,11 +19,13 @@ class Button:
         self.color = color
         self.hover_color = hover_color
         self.current_color = color
-        self.font = pygame.font.Font(None, 36)
+        self.font = load_font(36)
         self.hovered = False
         self.animation_time = 0
         self.selected = False
-        
+        self.glow_surface = None
+        self.glow_color = None
+    
     def update(self, mouse_pos):
         """Update button state and animation."""
         self.hovered = self.rect.collidepoint(mouse_pos)
@@ -39,15 +51,17 @@ class Button:
         
         # Add hover effect
         if self.hovered or self.selected:
-            # Glow effect
+            # Glow effect, redrawn only while the color is changing
             glow_rect = self.rect.inflate(10, 10)
-            glow_surface = pygame.Surface(glow_rect.size, pygame.SRCALPHA)
             glow_color = (*self.current_color[:3], 50)
-            pygame.draw.rect(glow_surface, glow_color, glow_surface.get_rect(), border_radius=15)
-            screen.blit(glow_surface, glow_rect)
+            if glow_color != self.glow_color:
+                self.glow_surface = pygame.Surface(glow_rect.size, pygame.SRCALPHA)
+                pygame.draw.rect(self.glow_surface, glow_color, self.glow_surface.get_rect(), border_radius=15)
+                self.glow_color = glow_color
+            screen.blit(self.glow_surface, glow_rect)
         
         # Draw text
-        text_surface = self.font.render(self.text, True, (255, 255, 255))
+        text_surface = render_text(self.font, self.text, (255, 255, 255))
         text_rect = text_surface.get_rect(center=self.rect.center)
         
         # Add slight bounce animation on hover
@@ -64,7 +78,7 @@ class Button:
                 self.rect.collidepoint(event.pos))
 
 class Menu:
-    def __init__(self, screen):
+    def __init__(self, screen, scores=None):
         self.screen = screen
         self.width, self.height = screen.get_size()
         
@@ -82,21 +96,29 @@ class Menu:
         self.GOLD = (255, 215, 0)
         
         # Fonts
-        self.title_font = pygame.font.Font(None, 72)
-        self.subtitle_font = pygame.font.Font(None, 24)
-        self.small_font = pygame.font.Font(None, 20)
+        self.title_font = load_font(72)
+        self.subtitle_font = load_font(24)
+        self.small_font = load_font(20)
         
         # Menu state
         self.current_menu = "main"  # "main", "mode_select", "high_scores"
         self.selected_mode = GameMode.CLASSIC
         
+        # High scores, shared with the game; the table is redrawn only
+        # when the store's version changes
+        self.scores = scores if scores is not None else ScoreStore()
+        self.scores_surface = None
+        self.scores_version = None
+        
         # Buttons
         self.create_buttons()
         
         # Animation variables
         self.time = 0
-        self.snake_segments = []
-        self.init_snake_animation()
+        self.init_demo()
+        
+        # Title over its glow, one frame per intensity level, built on first use
+        self.title_frames = {}
     
     def create_buttons(self):
         """Create all menu buttons."""
@@ -165,13 +187,40 @@ class Menu:
         self.survival_button.selected = (self.selected_mode == GameMode.SURVIVAL)
         self.time_attack_button.selected = (self.selected_mode == GameMode.TIME_ATTACK)
     
-    def init_snake_animation(self):
-        """Initialize animated snake for background."""
-        self.snake_segments = []
-        for i in range(15):
-            x = (i * 30) % self.width
-            y = 50 + (i * 20) % 100
-            self.snake_segments.append((x, y))
+    def init_demo(self):
+        """Set up the attract-mode snake played by the autopilot in the background."""
+        self.demo = SnakeSim(self.width // DEMO_CELL_SIZE, self.height // DEMO_CELL_SIZE)
+        self.demo.power_up_chance = 0
+        self.pilot = Autopilot(self.demo)
+        
+        # Each segment's look depends only on its place along the body, so
+        # draw its glow and body once; the body fades towards the tail
+        self.segment_sprites = []
+        for i in range(DEMO_MAX_LENGTH):
+            color = self.GREEN if i == 0 else self.DARK_GREEN
+            size = 9 if i == 0 else 7
+            alpha = max(40, 200 - i * 4)
+            
+            segment_surf = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+            segment_color = (*color, alpha)
+            pygame.draw.circle(segment_surf, segment_color, (size, size), size)
+            
+            glow_surf = pygame.Surface((size * 3, size * 3), pygame.SRCALPHA)
+            glow_color = (*color, alpha // 4)
+            pygame.draw.circle(glow_surf, glow_color, (size * 1.5, size * 1.5), size * 1.5)
+            
+            self.segment_sprites.append((glow_surf, segment_surf, size))
+        
+        self.food_sprite = pygame.Surface((12, 12), pygame.SRCALPHA)
+        pygame.draw.circle(self.food_sprite, (255, 60, 60, 90), (6, 6), 6)
+    
+    def update_demo(self):
+        """Advance the attract-mode game by one tick."""
+        demo = self.demo
+        if demo.game_over or len(demo.snake) >= DEMO_MAX_LENGTH:
+            demo.reset()
+        action = self.pilot.choose() if demo.move_due() else None
+        demo.step(action)
     
     def update(self):
         """Update menu animations."""
@@ -192,12 +241,10 @@ class Menu:
             self.back_button.update(mouse_pos)
         elif self.current_menu == "high_scores":
             self.back_button.update(mouse_pos)
+            self.scores.refresh()
         
         # Animate background snake
-        for i, (x, y) in enumerate(self.snake_segments):
-            new_x = (x + 1.5) % (self.width + 50)
-            new_y = y + math.sin(self.time + i * 0.3) * 3
-            self.snake_segments[i] = (new_x, new_y)
+        self.update_demo()
     
     def render(self):
         """Render the menu."""
@@ -220,12 +267,12 @@ class Menu:
         self.draw_title()
         
         # Draw subtitle
-        subtitle_text = self.subtitle_font.render("Enhanced Snake Game with Power-ups!", True, self.WHITE)
+        subtitle_text = render_text(self.subtitle_font, "Enhanced Snake Game with Power-ups!", self.WHITE)
         subtitle_rect = subtitle_text.get_rect(center=(self.width // 2, 150))
         self.screen.blit(subtitle_text, subtitle_rect)
         
         # Draw current mode
-        mode_text = self.small_font.render(f"Current Mode: {self.selected_mode.value.title()}", True, self.GOLD)
+        mode_text = render_text(self.small_font, f"Current Mode: {self.selected_mode.value.title()}", self.GOLD)
         mode_rect = mode_text.get_rect(center=(self.width // 2, 180))
         self.screen.blit(mode_text, mode_rect)
         
@@ -255,14 +302,14 @@ class Menu:
             if instruction == "":
                 continue
             color = self.WHITE if instruction.endswith(":") else (200, 200, 200)
-            text = self.small_font.render(instruction, True, color)
+            text = render_text(self.small_font, instruction, color)
             text_rect = text.get_rect(center=(self.width // 2, self.height - 250 + i * 20))
             self.screen.blit(text, text_rect)
     
     def render_mode_select(self):
         """Render the mode selection menu."""
         # Title
-        title_text = self.title_font.render("SELECT MODE", True, self.WHITE)
+        title_text = render_text(self.title_font, "SELECT MODE", self.WHITE)
         title_rect = title_text.get_rect(center=(self.width // 2, 100))
         self.screen.blit(title_text, title_rect)
         
@@ -290,84 +337,79 @@ class Menu:
         else:
             desc = descriptions[self.selected_mode]
         
-        desc_text = self.small_font.render(desc, True, self.WHITE)
+        desc_text = render_text(self.small_font, desc, self.WHITE)
         desc_rect = desc_text.get_rect(center=(self.width // 2, self.height - 100))
         self.screen.blit(desc_text, desc_rect)
     
     def render_high_scores(self):
         """Render the high scores menu."""
         # Title
-        title_text = self.title_font.render("HIGH SCORES", True, self.GOLD)
+        title_text = render_text(self.title_font, "HIGH SCORES", self.GOLD)
         title_rect = title_text.get_rect(center=(self.width // 2, 80))
         self.screen.blit(title_text, title_rect)
         
-        # Load high scores (placeholder - would normally load from game)
-        try:
-            import json
-            with open('high_scores.json', 'r') as f:
-                high_scores = json.load(f)
-        except:
-            high_scores = {mode.value: [] for mode in GameMode}
+        # Scores for each mode
+        if self.scores_version != self.scores.version:
+            self.scores_surface = self.render_scores_table()
+            self.scores_version = self.scores.version
+        self.screen.blit(self.scores_surface, (0, 150))
         
-        # Draw scores for each mode
-        y_offset = 150
+        # Draw back button
+        self.back_button.render(self.screen)
+    
+    def render_scores_table(self):
+        """Draw each mode's top score onto a transparent surface."""
+        surface = pygame.Surface((self.width, len(GameMode) * 40), pygame.SRCALPHA)
+        y_offset = 0
         for mode in GameMode:
-            mode_text = self.subtitle_font.render(f"{mode.value.title()}:", True, self.WHITE)
-            self.screen.blit(mode_text, (self.width // 2 - 100, y_offset))
+            mode_text = render_text(self.subtitle_font, f"{mode.value.title()}:", self.WHITE)
+            surface.blit(mode_text, (self.width // 2 - 100, y_offset))
             
-            scores = high_scores.get(mode.value, [])
-            if scores:
-                top_score = str(scores[0])
-            else:
-                top_score = "0"
-            
-            score_text = self.subtitle_font.render(top_score, True, self.GOLD)
-            self.screen.blit(score_text, (self.width // 2 + 50, y_offset))
+            top_score = str(self.scores.best(mode))
+            score_text = render_text(self.subtitle_font, top_score, self.GOLD)
+            surface.blit(score_text, (self.width // 2 + 50, y_offset))
             
             y_offset += 40
-        
-        # Draw back button
-        self.back_button.render(self.screen)
+        return surface
     
     def draw_background_snake(self):
-        """Draw animated snake in background."""
-        for i, (x, y) in enumerate(self.snake_segments):
-            color = self.GREEN if i == 0 else self.DARK_GREEN
-            size = 12 if i == 0 else 8
-            alpha = max(50, 255 - i * 15)
-            
-            # Create snake segment with transparency
-            segment_surf = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
-            segment_color = (*color, alpha)
-            pygame.draw.circle(segment_surf, segment_color, (size, size), size)
-            
-            # Add glow effect
-            glow_surf = pygame.Surface((size * 3, size * 3), pygame.SRCALPHA)
-            glow_color = (*color, alpha // 4)
-            pygame.draw.circle(glow_surf, glow_color, (size * 1.5, size * 1.5), size * 1.5)
+        """Draw the attract-mode snake and its food in the background."""
+        half = DEMO_CELL_SIZE // 2
+        sprites = []
+        if self.demo.food is not None:
+            x, y = self.demo.food
+            sprites.append((self.food_sprite, (x * DEMO_CELL_SIZE + half - 6,
+                                               y * DEMO_CELL_SIZE + half - 6)))
+        for (x, y), (glow_surf, segment_surf, size) in zip(self.demo.snake, self.segment_sprites):
+            x = x * DEMO_CELL_SIZE + half
+            y = y * DEMO_CELL_SIZE + half
+            sprites.append((glow_surf, (x - size * 1.5, y - size * 1.5)))
+            sprites.append((segment_surf, (x - size, y - size)))
+        self.screen.blits(sprites, False)
+    
+    def title_frame(self, level):
+        """The title drawn over its glow at one intensity level."""
+        frame = self.title_frames.get(level)
+        if frame is None:
+            title_text = render_text(self.title_font, "SNAKE GAME", self.GREEN)
+            intensity = 0.5 + 0.5 * level / (TITLE_GLOW_LEVELS - 1)
+            glow_color = (0, int(255 * intensity), 0)
+            glow_text = self.title_font.render("SNAKE GAME", True, (*glow_color, 100))
             
-            self.screen.blit(glow_surf, (x - size * 1.5, y - size * 1.5))
-            self.screen.blit(segment_surf, (x - size, y - size))
+            # Each of the three glow passes lands exactly under the title
+            frame = pygame.Surface(title_text.get_size(), pygame.SRCALPHA)
+            for _ in range(3):
+                frame.blit(glow_text, (0, 0))
+            frame.blit(title_text, (0, 0))
+            self.title_frames[level] = frame
+        return frame
     
     def draw_title(self):
         """Draw title with animated glow effect."""
-        title_text = self.title_font.render("SNAKE GAME", True, self.GREEN)
-        title_rect = title_text.get_rect(center=(self.width // 2, 100))
-        
-        # Glow effect
-        glow_intensity = abs(math.sin(self.time * 2)) * 0.5 + 0.5
-        glow_color = (0, int(255 * glow_intensity), 0)
-        
-        # Draw glow
-        for offset in range(3, 0, -1):
-            glow_surf = pygame.Surface((title_rect.width + offset * 2, title_rect.height + offset * 2), pygame.SRCALPHA)
-            glow_text = self.title_font.render("SNAKE GAME", True, (*glow_color, 100))
-            glow_rect = glow_text.get_rect(center=(glow_surf.get_width() // 2, glow_surf.get_height() // 2))
-            glow_surf.blit(glow_text, glow_rect)
-            self.screen.blit(glow_surf, (title_rect.x - offset, title_rect.y - offset))
-        
-        # Draw main text
-        self.screen.blit(title_text, title_rect)
+        glow_intensity = abs(math.sin(self.time * 2))
+        level = round(glow_intensity * (TITLE_GLOW_LEVELS - 1))
+        frame = self.title_frame(level)
+        self.screen.blit(frame, frame.get_rect(center=(self.width // 2, 100)))
     
     def handle_event(self, event):
         """Handle menu events. Returns action string or game mode."""
@@ -0,0 +1,138 @@
+"""Vectorized particle effects.
+
+ParticleSystem keeps every live particle in structure-of-arrays NumPy
+buffers and updates them with whole-array math. Drawing blits pre-rendered
+circle sprites from a cache instead of allocating a surface per particle.
+"""
+import math
+import pygame
+import numpy as np
+
+ALPHA_LEVELS = 32  # Alpha is quantized to this many sprite variants
+
+# Per-particle buffers and their dtypes
+FIELDS = (
+    ('x', np.float32), ('y', np.float32),
+    ('vx', np.float32), ('vy', np.float32),
+    ('lifetime', np.int16), ('max_lifetime', np.int16),
+    ('size', np.int8), ('color', np.int16)
+)
+
+class ParticleSystem:
+    def __init__(self, capacity=256, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self.allocate(capacity)
+        
+        # Particle colors are stored as indices into this palette
+        self.palette = []
+        self.palette_index = {}
+        
+        # (color index, radius, alpha level) -> circle sprite
+        self.sprites = {}
+    
+    def allocate(self, capacity):
+        """(Re)allocate the buffers, keeping the live particles."""
+        for name, dtype in FIELDS:
+            buffer = np.zeros(capacity, dtype=dtype)
+            if self.count:
+                buffer[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, buffer)
+        self.capacity = capacity
+    
+    def __len__(self):
+        return self.count
+    
+    def clear(self):
+        self.count = 0
+    
+    def emit(self, x, y, color, count):
+        """Emit a burst of particles from (x, y) in random directions."""
+        if self.count + count > self.capacity:
+            self.allocate(max(self.capacity * 2, self.count + count))
+        
+        if color not in self.palette_index:
+            self.palette_index[color] = len(self.palette)
+            self.palette.append(color)
+        
+        new = slice(self.count, self.count + count)
+        angle = self.rng.uniform(0, 2 * math.pi, count)
+        speed = self.rng.uniform(2, 8, count)
+        self.x[new] = x
+        self.y[new] = y
+        self.vx[new] = np.cos(angle) * speed
+        self.vy[new] = np.sin(angle) * speed
+        self.lifetime[new] = self.rng.integers(15, 31, count)
+        self.max_lifetime[new] = self.lifetime[new]
+        self.size[new] = self.rng.integers(2, 6, count)
+        self.color[new] = self.palette_index[color]
+        self.count += count
+    
+    def update(self):
+        """Advance every particle one frame and compact out the dead ones."""
+        n = self.count
+        if n == 0:
+            return
+        live = slice(0, n)
+        self.x[live] += self.vx[live]
+        self.y[live] += self.vy[live]
+        self.lifetime[live] -= 1
+        self.vx[live] *= 0.95
+        self.vy[live] *= 0.95
+        
+        alive = self.lifetime[live] > 0
+        if not alive.all():
+            keep = np.flatnonzero(alive)
+            for name, _ in FIELDS:
+                buffer = getattr(self, name)
+                buffer[:len(keep)] = buffer[keep]
+            self.count = len(keep)
+    
+    def sprite(self, color_index, radius, level):
+        """Return the cached circle sprite for a color, radius and alpha level."""
+        key = (color_index, radius, level)
+        surf = self.sprites.get(key)
+        if surf is None:
+            alpha = level * 255 // (ALPHA_LEVELS - 1)
+            surf = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surf, (*self.palette[color_index], alpha), (radius, radius), radius)
+            self.sprites[key] = surf
+        return surf
+    
+    def render(self, screen, alpha=0.0):
+        """Draw every live particle with a single batched blit.
+        
+        alpha is the fraction of an update elapsed since the last one;
+        positions are extrapolated along the velocity by that much.
+        Returns the bounding rect of everything drawn, or None.
+        """
+        n = self.count
+        if n == 0:
+            return None
+        ratio = self.lifetime[:n] / self.max_lifetime[:n]
+        radius = (self.size[:n] * ratio).astype(np.int32)
+        level = (ratio * (ALPHA_LEVELS - 1)).astype(np.int32)
+        visible = np.flatnonzero(radius > 0)
+        if len(visible) == 0:
+            return None
+        
+        left = self.x[visible] + self.vx[visible] * alpha - radius[visible]
+        top = self.y[visible] + self.vy[visible] * alpha - radius[visible]
+        size = 2 * radius[visible]
+        x0 = int(np.floor(left.min()))
+        y0 = int(np.floor(top.min()))
+        bounds = pygame.Rect(x0, y0,
+                             int(np.ceil((left + size).max())) - x0 + 1,
+                             int(np.ceil((top + size).max())) - y0 + 1)
+        
+        left = left.tolist()
+        top = top.tolist()
+        colors = self.color[visible].tolist()
+        radii = radius[visible].tolist()
+        levels = level[visible].tolist()
+        sprite = self.sprite
+        screen.blits([
+            (sprite(c, r, a), (lx, ty))
+            for c, r, a, lx, ty in zip(colors, radii, levels, left, top)
+        ], False)
+        return bounds
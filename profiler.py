@@ -0,0 +1,135 @@
+"""Frame-time profiling.
+
+Profiler times named spans inside each frame and keeps a rolling window of
+recent frames, from which it reports p50/p95/p99 per span. Frames can also
+be streamed to a trace file (.jsonl, or .csv in long format: one row per
+span) to compare builds or look for regressions under load.
+
+    with profiler.span("game.render"):
+        game.render()
+
+A disabled profiler's span() returns a shared no-op context, so leaving the
+hooks in costs next to nothing.
+"""
+import csv
+import json
+import time
+from collections import deque
+
+FRAME = "frame"  # Span covering each whole frame
+
+class NullSpan:
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        timings = self.profiler.current
+        timings[self.name] = timings.get(self.name, 0.0) + elapsed
+        return False
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    index = min(int(fraction * len(ordered)), len(ordered) - 1)
+    return ordered[index]
+
+class Profiler:
+    def __init__(self, window=300, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self.history = {}  # span name -> deque of recent durations (seconds)
+        self.current = {}  # span name -> seconds spent this frame
+        self.frame_index = 0
+        self.frame_start = None
+        self.trace_file = None
+        self.trace_writer = None
+    
+    def span(self, name):
+        """Context manager timing one named phase of the current frame."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+    
+    def begin_frame(self):
+        if self.enabled:
+            self.current = {}
+            self.frame_start = time.perf_counter()
+    
+    def end_frame(self, **extra):
+        """Close the frame, fold its spans into the history and trace it.
+        
+        Extra keyword values (e.g. the wall-clock dt) go to the trace only.
+        """
+        if not self.enabled or self.frame_start is None:
+            return
+        self.current[FRAME] = time.perf_counter() - self.frame_start
+        self.frame_start = None
+        
+        for name, elapsed in self.current.items():
+            samples = self.history.get(name)
+            if samples is None:
+                samples = self.history[name] = deque(maxlen=self.window)
+            samples.append(elapsed)
+        
+        if self.trace_file is not None:
+            self.write_trace(extra)
+        self.frame_index += 1
+    
+    def percentiles(self, name=FRAME):
+        """Rolling (p50, p95, p99) of a span in milliseconds."""
+        ordered = sorted(self.history.get(name, ()))
+        return tuple(percentile(ordered, p) * 1000 for p in (0.50, 0.95, 0.99))
+    
+    def summary(self):
+        """{span: (p50, p95, p99)} in milliseconds, slowest p95 first."""
+        stats = {name: self.percentiles(name) for name in self.history}
+        return dict(sorted(stats.items(), key=lambda item: item[1][1], reverse=True))
+    
+    def reset(self):
+        self.history = {}
+        self.current = {}
+    
+    def open_trace(self, path):
+        """Stream every frame to path: JSON lines, or CSV if it ends in .csv."""
+        self.close_trace()
+        self.trace_file = open(path, 'w', newline='')
+        if path.endswith('.csv'):
+            self.trace_writer = csv.writer(self.trace_file)
+            self.trace_writer.writerow(["frame", "span", "ms"])
+        else:
+            self.trace_writer = None
+    
+    def write_trace(self, extra):
+        spans = {name: round(elapsed * 1000, 4) for name, elapsed in self.current.items()}
+        if self.trace_writer is not None:
+            for name, ms in spans.items():
+                self.trace_writer.writerow([self.frame_index, name, ms])
+            for name, value in extra.items():
+                self.trace_writer.writerow([self.frame_index, name, value])
+        else:
+            record = {"frame": self.frame_index, "spans": spans}
+            record.update(extra)
+            self.trace_file.write(json.dumps(record) + "\n")
+    
+    def close_trace(self):
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
+            self.trace_writer = None
@@ -0,0 +1,53 @@
+"""On-screen frame-time overlay for the Profiler (toggled with F3)."""
+import time
+import pygame
+from profiler import FRAME
+from text_cache import load_font
+
+class ProfilerOverlay:
+    def __init__(self, profiler, max_spans=8, update_interval=0.25):
+        self.profiler = profiler
+        self.max_spans = max_spans
+        self.update_interval = update_interval
+        self.font = load_font(20)
+        self.visible = False
+        self.panel = None
+        self.last_update = 0.0
+    
+    def toggle(self):
+        self.visible = not self.visible
+        self.panel = None
+    
+    def build_panel(self):
+        """Render the stats table; the numbers change too often for the text cache."""
+        lines = ["span                p50    p95    p99 ms"]
+        for name, (p50, p95, p99) in list(self.profiler.summary().items())[:self.max_spans + 1]:
+            lines.append(f"{name:<16} {p50:6.2f} {p95:6.2f} {p99:6.2f}")
+        if FRAME in self.profiler.history:
+            p50 = self.profiler.percentiles(FRAME)[0]
+            if p50 > 0:
+                lines.append(f"work at p50 allows {1000 / p50:.0f} fps")
+        
+        rendered = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(text.get_width() for text in rendered) + 12
+        height = sum(text.get_height() for text in rendered) + 8
+        # Opaque, so drawing it again each frame never accumulates
+        panel = pygame.Surface((width, height))
+        panel.fill((20, 20, 30))
+        y = 4
+        for text in rendered:
+            panel.blit(text, (6, y))
+            y += text.get_height()
+        return panel
+    
+    def render(self, screen):
+        """Draw the overlay in the top-right corner. Returns its rect, or None."""
+        if not self.visible:
+            return None
+        now = time.perf_counter()
+        if self.panel is None or now - self.last_update >= self.update_interval:
+            self.panel = self.build_panel()
+            self.last_update = now
+        rect = self.panel.get_rect(topright=(screen.get_width() - 10, 10))
+        screen.blit(self.panel, rect)
+        return rect
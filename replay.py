@@ -0,0 +1,180 @@
+"""Compact, deterministic game replays.
+
+A game is fully determined by its mode, board size, RNG seed and the ticks
+at which the player changed direction, so that is all a replay stores:
+    
+    header   b"SNKR", format version, mode, grid width, grid height, seed
+    inputs   varint count, then one varint per input: (tick delta << 2) | direction
+    result   varint final tick, varint final score
+
+A typical game is a few hundred bytes. play() re-runs a replay through
+SnakeSim as fast as the CPU allows, and verify() checks it reproduces the
+recorded result.
+    
+    python replay.py replays/<id>.snkr
+"""
+import os
+import struct
+import sys
+import time
+from fileio import write_atomic
+from sim import Direction, GameMode, SnakeSim
+
+MAGIC = b"SNKR"
+VERSION = 1
+REPLAY_DIR = "replays"
+EXTENSION = ".snkr"
+
+HEADER = struct.Struct("<4sBBHHQ")
+DIRECTIONS = list(Direction)
+MODES = list(GameMode)
+
+class ReplayError(ValueError):
+    """Raised for data that isn't a valid replay."""
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, offset):
+    """Decode a varint at offset. Returns (value, next offset)."""
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ReplayError("truncated replay")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+class Replay:
+    def __init__(self, game_mode, seed, grid_width, grid_height):
+        self.game_mode = game_mode
+        self.seed = seed
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.inputs = []  # (tick, Direction) in tick order
+        self.final_tick = 0
+        self.score = 0
+    
+    @classmethod
+    def start(cls, sim):
+        """Begin recording the game sim has just been reset to."""
+        return cls(sim.game_mode, sim.seed, sim.grid_width, sim.grid_height)
+    
+    def record(self, tick, direction):
+        """Record that direction was passed to the step() after tick."""
+        self.inputs.append((tick, direction))
+    
+    def finish(self, sim):
+        """Store the game's final tick and score."""
+        self.final_tick = sim.tick
+        self.score = sim.score
+    
+    def encode(self):
+        out = bytearray(HEADER.pack(MAGIC, VERSION, MODES.index(self.game_mode),
+                                    self.grid_width, self.grid_height, self.seed))
+        write_varint(out, len(self.inputs))
+        previous = 0
+        for tick, direction in self.inputs:
+            write_varint(out, (tick - previous) << 2 | DIRECTIONS.index(direction))
+            previous = tick
+        write_varint(out, self.final_tick)
+        write_varint(out, self.score)
+        return bytes(out)
+    
+    @classmethod
+    def decode(cls, data):
+        if len(data) < HEADER.size:
+            raise ReplayError("truncated replay")
+        magic, version, mode, grid_width, grid_height, seed = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError("not a replay file")
+        if version != VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        if mode >= len(MODES):
+            raise ReplayError(f"unknown game mode {mode}")
+        
+        replay = cls(MODES[mode], seed, grid_width, grid_height)
+        count, offset = read_varint(data, HEADER.size)
+        tick = 0
+        for _ in range(count):
+            value, offset = read_varint(data, offset)
+            tick += value >> 2
+            replay.inputs.append((tick, DIRECTIONS[value & 3]))
+        replay.final_tick, offset = read_varint(data, offset)
+        replay.score, offset = read_varint(data, offset)
+        return replay
+    
+    def save(self, path):
+        """Write the replay atomically."""
+        write_atomic(path, self.encode())
+    
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.decode(f.read())
+
+def replay_path(replay_id):
+    return os.path.join(REPLAY_DIR, replay_id + EXTENSION)
+
+def save_replay(replay):
+    """Save a finished replay under REPLAY_DIR. Returns its id."""
+    os.makedirs(REPLAY_DIR, exist_ok=True)
+    replay_id = f"{int(time.time())}-{replay.seed & 0xFFFFFFFF:08x}"
+    replay.save(replay_path(replay_id))
+    return replay_id
+
+def play(replay, sim=None):
+    """Re-run a replay headlessly and return the finished simulation.
+    
+    Pass a SnakeSim (or subclass) to reuse it; it is reset to the replay's
+    mode and seed.
+    """
+    if sim is None:
+        sim = SnakeSim(replay.grid_width, replay.grid_height, replay.game_mode, replay.seed)
+    else:
+        sim.game_mode = replay.game_mode
+        sim.reset(replay.seed)
+    
+    inputs = replay.inputs
+    next_input = 0
+    while not sim.game_over and sim.tick < replay.final_tick:
+        action = None
+        # Several inputs can land on one tick; the last one wins, as in the game
+        while next_input < len(inputs) and inputs[next_input][0] == sim.tick:
+            action = inputs[next_input][1]
+            next_input += 1
+        sim.step(action)
+    return sim
+
+def verify(replay):
+    """Check that replaying reproduces the recorded tick count and score."""
+    sim = play(replay)
+    return sim.tick == replay.final_tick and sim.score == replay.score
+
+def main(paths):
+    if not paths:
+        print("usage: python replay.py REPLAY [REPLAY ...]")
+        return 2
+    failed = 0
+    for path in paths:
+        replay = Replay.load(path)
+        started = time.perf_counter()
+        sim = play(replay)
+        elapsed = time.perf_counter() - started
+        ok = sim.tick == replay.final_tick and sim.score == replay.score
+        failed += not ok
+        print(f"{path}: {replay.game_mode.value}, {len(replay.inputs)} inputs, "
+              f"{os.path.getsize(path)} bytes, score {sim.score} over {sim.tick} ticks "
+              f"in {elapsed * 1000:.0f} ms - {'ok' if ok else 'MISMATCH'} "
+              f"(recorded score {replay.score} over {replay.final_tick} ticks)")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,204 @@
+"""Persistent high-score store.
+
+Each game mode keeps its top scores in a bounded min-heap, so adding a score
+is O(log k) and a score that doesn't make the table costs nothing. A score
+that does is appended as one JSON line to the log; appends are tiny and a
+torn last line (e.g. from a crash mid-write) is skipped on load. Every
+COMPACT_EVERY appends, and on load, the table is compacted back into
+high_scores.json by writing a temporary file and renaming it over the old
+one, so the JSON file is never left half-written.
+
+One store is shared by the game and the menu. Its version counter goes up
+on every change, so views can cache what they draw from it, and refresh()
+only reloads when another process has modified the files.
+"""
+import heapq
+import json
+import os
+import time
+from fileio import write_atomic
+from sim import GameMode
+
+SCORES_PATH = 'high_scores.json'
+MAX_SCORES = 10  # Scores kept per game mode
+COMPACT_EVERY = 32  # Log appends between compactions
+REFRESH_INTERVAL = 1.0  # Seconds between checks for outside changes
+
+def make_record(score, level=None, length=None, duration=None, replay=None, timestamp=None):
+    """A high-score entry as stored in the JSON file."""
+    return {
+        "score": score,
+        "level": level,
+        "length": length,
+        "duration": duration,
+        "replay": replay,
+        "time": int(time.time()) if timestamp is None else timestamp
+    }
+
+class ScoreStore:
+    def __init__(self, path=SCORES_PATH, max_scores=MAX_SCORES, compact_every=COMPACT_EVERY,
+                 refresh_interval=REFRESH_INTERVAL):
+        self.path = path
+        self.log_path = os.path.splitext(path)[0] + '.log'
+        self.max_scores = max_scores
+        self.compact_every = compact_every
+        self.heaps = {}
+        self.sorted = {}  # Cached descending tables, dropped on change
+        self.sequence = 0  # Insertion counter; older entries win ties
+        self.appends = 0
+        self.version = 0  # Bumped on every change
+        self.refresh_interval = refresh_interval
+        self.last_refresh = 0.0
+        self.stamp = None  # File stamps as of our last read or write
+        self.load()
+    
+    def key(self, mode):
+        return mode.value if isinstance(mode, GameMode) else mode
+    
+    def load(self):
+        """Load the compacted table and the log, then fold the log in."""
+        self.heaps = {mode.value: [] for mode in GameMode}
+        self.sorted = {}
+        self.sequence = 0
+        
+        try:
+            with open(self.path, 'r') as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            # Missing, empty or corrupt file: start with an empty table
+            table = {}
+        if isinstance(table, dict):
+            for mode, records in table.items():
+                if isinstance(records, list):
+                    for record in records:
+                        self.insert(mode, record)
+        
+        logged = 0
+        try:
+            with open(self.log_path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        mode, record = entry["mode"], entry["record"]
+                    except (ValueError, KeyError, TypeError):
+                        continue  # Torn or foreign line
+                    if not isinstance(mode, str):
+                        continue
+                    # Skip entries already compacted if we stopped before the
+                    # log was cleared
+                    if record not in self.top(mode):
+                        self.insert(mode, record)
+                    logged += 1
+        except OSError:
+            pass
+        
+        if logged:
+            self.compact()
+        self.stamp = self.file_stamp()
+        self.version += 1
+    
+    def file_stamp(self):
+        """(mtime, size) of the table and the log, None for a missing file."""
+        stamp = []
+        for path in (self.path, self.log_path):
+            try:
+                info = os.stat(path)
+                stamp.append((info.st_mtime_ns, info.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+    
+    def refresh(self, now=None):
+        """Reload if the files changed on disk since we last touched them.
+        
+        Checks at most once every refresh_interval seconds. Returns True if
+        the scores were reloaded.
+        """
+        now = time.monotonic() if now is None else now
+        if now - self.last_refresh < self.refresh_interval:
+            return False
+        self.last_refresh = now
+        if self.file_stamp() == self.stamp:
+            return False
+        self.load()
+        return True
+    
+    def insert(self, mode, record):
+        """Push a record onto its mode's heap. Returns True if it was kept."""
+        if isinstance(record, int):
+            # Legacy files stored bare scores
+            record = make_record(record, timestamp=0)
+        if not isinstance(record, dict) or not isinstance(record.get("score"), int):
+            return False
+        
+        heap = self.heaps.setdefault(self.key(mode), [])
+        self.sequence += 1
+        entry = (record["score"], -self.sequence, record)
+        if len(heap) < self.max_scores:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+        else:
+            return False
+        self.sorted.pop(self.key(mode), None)
+        return True
+    
+    def qualifies(self, mode, score):
+        """Check whether score would make the mode's table."""
+        heap = self.heaps.get(self.key(mode), [])
+        return len(heap) < self.max_scores or score > heap[0][0]
+    
+    def add(self, mode, score, level=None, length=None, duration=None, replay=None):
+        """Record a finished game. Returns the stored record, or None if it
+        didn't make the table."""
+        record = make_record(score, level, length, duration, replay)
+        if not self.insert(mode, record):
+            return None
+        
+        try:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps({"mode": self.key(mode), "record": record}) + "\n")
+        except OSError:
+            # Keep the score in memory even if the disk isn't writable
+            pass
+        
+        self.appends += 1
+        if self.appends >= self.compact_every:
+            self.compact()
+        self.stamp = self.file_stamp()
+        self.version += 1
+        return record
+    
+    def top(self, mode, count=None):
+        """Records for a mode, best first."""
+        key = self.key(mode)
+        table = self.sorted.get(key)
+        if table is None:
+            table = [record for _, _, record in sorted(self.heaps.get(key, []), reverse=True)]
+            self.sorted[key] = table
+        return table if count is None else table[:count]
+    
+    def best(self, mode):
+        """The mode's high score, or 0 if there is none."""
+        heap = self.heaps.get(self.key(mode))
+        return max(heap)[0] if heap else 0
+    
+    def compact(self):
+        """Atomically rewrite the JSON table and clear the log."""
+        table = {mode: self.top(mode) for mode in self.heaps}
+        try:
+            # On disk before the log is emptied, so a crash can't leave an
+            # empty table next to an emptied log
+            write_atomic(self.path, json.dumps(table).encode())
+            # Everything in the log is in the table now
+            with open(self.log_path, 'w'):
+                pass
+        except OSError:
+            return
+        self.appends = 0
+        self.stamp = self.file_stamp()
+    
+    def close(self):
+        """Compact any logged scores, e.g. on exit."""
+        if self.appends:
+            self.compact()
@@ -0,0 +1,318 @@
+"""Authoritative multiplayer server.
+
+One asyncio task steps every room's Arena at the fixed TICK_RATE and sends
+each room's changes to its players; there are no per-room threads or tasks,
+so one process holds hundreds of rooms. Players talk newline-delimited JSON
+over TCP:
+
+    -> {"room": "lobby"}              join (or create) a room
+    <- {"welcome": 3, "w": 40, ...}   your player id and the whole board
+    -> {"dir": "UP"}                  change direction (a Direction name)
+    -> {"respawn": true}              play again after dying
+    <- {"t": 1234, "m": [[3, 612, 611]], ...}   what changed in a tick
+
+Cells are flat indices y * width + x and power-up types are indices into
+POWER_UP_TYPES. A tick message only carries the keys that changed, and
+ticks where nothing changed send nothing:
+
+    m  [[player, head, tail], ...]  tail is -1 when the snake grew
+    j  [[player, [cells]], ...]     joined or respawned, head first
+    l  [player, ...]                left the room
+    d  [[player, reason], ...]      died; the body leaves the board
+    s  [[player, score], ...]       new scores
+    f  cell                         food moved (-1: none)
+    p  [[cell, type], ...]          power-ups spawned
+    c  [[player, cell, type], ...]  power-ups collected
+    g  [cell, ...]                  power-ups expired
+    o  [cell, ...]                  new obstacle layout
+
+BoardState applies these messages to mirror a room, for clients and tests.
+WebSocket framing is left to a proxy.
+
+    python server.py --port 8765 --mode survival
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections import deque
+from arena import Arena
+from batch_env import POWER_UP_TYPES
+from sim import Direction, GameMode, TICK_RATE
+
+MAX_LINE = 4096  # Longest client message accepted
+MAX_BUFFER = 1 << 20  # Drop a client that falls this many bytes behind
+
+def cell_index(pos, width):
+    return -1 if pos is None else pos[1] * width + pos[0]
+
+def encode_events(events, tick, width):
+    """Pack one tick's Arena events into a message dict."""
+    def cell(pos):
+        return cell_index(pos, width)
+    
+    message = {"t": tick}
+    for event in events:
+        kind = event[0]
+        if kind == "move":
+            message.setdefault("m", []).append([event[1], cell(event[2]), cell(event[3])])
+        elif kind == "join":
+            message.setdefault("j", []).append([event[1], [cell(pos) for pos in event[2]]])
+        elif kind == "leave":
+            message.setdefault("l", []).append(event[1])
+        elif kind == "die":
+            message.setdefault("d", []).append([event[1], event[2]])
+        elif kind == "score":
+            message.setdefault("s", []).append([event[1], event[2]])
+        elif kind == "food":
+            message["f"] = cell(event[1])
+        elif kind == "power_up":
+            message.setdefault("p", []).append([cell(event[1]), POWER_UP_TYPES.index(event[2])])
+        elif kind == "collect":
+            message.setdefault("c", []).append([event[1], cell(event[2]),
+                                                POWER_UP_TYPES.index(event[3])])
+        elif kind == "power_up_gone":
+            message.setdefault("g", []).append(cell(event[1]))
+        elif kind == "obstacles":
+            message["o"] = [cell(pos) for pos in event[1]]
+    return message
+
+def encode_board(arena, player_id, room):
+    """The welcome message: everything a new player needs to draw the board."""
+    def cell(pos):
+        return cell_index(pos, arena.grid_width)
+    
+    alive = [player for player in arena.players.values() if player.alive]
+    return {
+        "welcome": player_id,
+        "room": room,
+        "w": arena.grid_width,
+        "h": arena.grid_height,
+        "mode": arena.game_mode.value,
+        "t": arena.tick,
+        "j": [[player.id, [cell(pos) for pos in player.snake]] for player in alive],
+        "s": [[player.id, player.score] for player in arena.players.values()],
+        "f": cell(arena.food),
+        "p": [[cell(power_up.pos), POWER_UP_TYPES.index(power_up.type)]
+              for power_up in arena.power_ups],
+        "o": [cell(obstacle.pos) for obstacle in arena.obstacles]
+    }
+
+class BoardState:
+    """A room mirrored from the welcome and tick messages."""
+    
+    def __init__(self, welcome):
+        self.player_id = welcome["welcome"]
+        self.width = welcome["w"]
+        self.height = welcome["h"]
+        self.tick = welcome["t"]
+        self.snakes = {}  # player id -> deque of cells, head first
+        self.scores = {}
+        self.food = -1
+        self.power_ups = {}  # cell -> type index
+        self.obstacles = set()
+        self.apply(welcome)
+    
+    def apply(self, message):
+        # Joins and leaves happen between ticks, so a snake can join, move
+        # and die in one message, in that order
+        self.tick = message["t"]
+        for player_id, cells in message.get("j", ()):
+            self.snakes[player_id] = deque(cells)
+            self.scores[player_id] = 0
+        for player_id, head, tail in message.get("m", ()):
+            snake = self.snakes[player_id]
+            snake.appendleft(head)
+            if tail >= 0:
+                snake.pop()
+        for player_id, reason in message.get("d", ()):
+            self.snakes.pop(player_id, None)
+        for player_id in message.get("l", ()):
+            self.snakes.pop(player_id, None)
+            self.scores.pop(player_id, None)
+        for player_id, score in message.get("s", ()):
+            self.scores[player_id] = score
+        if "f" in message:
+            self.food = message["f"]
+        for cell, power_type in message.get("p", ()):
+            self.power_ups[cell] = power_type
+        for player_id, cell, power_type in message.get("c", ()):
+            self.power_ups.pop(cell, None)
+        for cell in message.get("g", ()):
+            self.power_ups.pop(cell, None)
+        if "o" in message:
+            self.obstacles = set(message["o"])
+
+class Room:
+    def __init__(self, name, arena):
+        self.name = name
+        self.arena = arena
+        self.writers = {}  # player id -> StreamWriter
+
+class GameServer:
+    def __init__(self, grid_width=40, grid_height=30, game_mode=GameMode.CLASSIC,
+                 tick_rate=TICK_RATE, seed=None):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.game_mode = game_mode
+        self.tick_rate = tick_rate
+        self.seed = seed
+        self.rooms = {}
+        self.server = None
+        self.ticker = None
+        self.connections = set()  # Tasks handling each player's connection
+        self.bytes_sent = 0
+        self.late_ticks = 0
+    
+    async def start(self, host="127.0.0.1", port=0):
+        """Listen for players and start the tick loop. Returns the bound port."""
+        self.server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE)
+        self.ticker = asyncio.create_task(self.run())
+        return self.server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        if self.ticker is not None:
+            self.ticker.cancel()
+        self.server.close()
+        for task in self.connections:
+            task.cancel()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        await self.server.wait_closed()
+    
+    async def run(self):
+        """Step every room at a fixed rate, skipping ahead if a tick ran long."""
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        deadline = loop.time()
+        while True:
+            self.tick()
+            deadline += interval
+            delay = deadline - loop.time()
+            if delay < -interval:
+                # Far behind: drop the missed ticks rather than racing to catch up
+                self.late_ticks += 1
+                deadline = loop.time()
+                delay = 0
+            await asyncio.sleep(max(delay, 0))
+    
+    def tick(self):
+        """Advance every room by one tick and send out its changes."""
+        for room in list(self.rooms.values()):
+            events = room.arena.step()
+            if events:
+                message = encode_events(events, room.arena.tick, room.arena.grid_width)
+                self.broadcast(room, (json.dumps(message, separators=(',', ':')) + "\n").encode())
+    
+    def broadcast(self, room, data):
+        for player_id, writer in list(room.writers.items()):
+            if writer.transport.get_write_buffer_size() > MAX_BUFFER:
+                writer.close()
+                continue
+            writer.write(data)
+            self.bytes_sent += len(data)
+    
+    def join(self, name):
+        room = self.rooms.get(name)
+        if room is None:
+            seed = None if self.seed is None else f"{self.seed}:{name}"
+            arena = Arena(self.grid_width, self.grid_height, self.game_mode, seed)
+            room = self.rooms[name] = Room(name, arena)
+        return room, room.arena.add_player()
+    
+    def leave(self, room, player_id):
+        room.writers.pop(player_id, None)
+        room.arena.remove_player(player_id)
+        if not room.writers:
+            del self.rooms[room.name]
+    
+    async def handle(self, reader, writer):
+        """One player's connection: join a room, then apply their inputs."""
+        room = player_id = None
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            hello = json.loads(await reader.readline())
+            if not isinstance(hello, dict):
+                return
+            room, player_id = self.join(str(hello["room"]))
+            welcome = encode_board(room.arena, player_id, room.name)
+            writer.write((json.dumps(welcome, separators=(',', ':')) + "\n").encode())
+            room.writers[player_id] = writer
+            
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if not isinstance(message, dict):
+                    break
+                if "dir" in message:
+                    room.arena.set_direction(player_id, Direction[message["dir"]])
+                if message.get("respawn") and not room.arena.players[player_id].alive:
+                    room.arena.respawn(player_id)
+        except (ValueError, KeyError, TypeError, ConnectionError):
+            # Malformed input or a dropped connection ends the session
+            pass
+        except asyncio.CancelledError:
+            # The server is stopping
+            pass
+        finally:
+            if room is not None:
+                self.leave(room, player_id)
+            writer.close()
+            self.connections.discard(task)
+
+class Client:
+    """A minimal player connection, for bots and tests."""
+    
+    def __init__(self, reader, writer, state):
+        self.reader = reader
+        self.writer = writer
+        self.state = state
+    
+    @classmethod
+    async def connect(cls, room, host="127.0.0.1", port=8765):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write((json.dumps({"room": room}) + "\n").encode())
+        welcome = json.loads(await reader.readline())
+        return cls(reader, writer, BoardState(welcome))
+    
+    def send(self, **message):
+        self.writer.write((json.dumps(message) + "\n").encode())
+    
+    async def receive(self):
+        """Apply the next tick message. Returns it, or None once disconnected."""
+        line = await self.reader.readline()
+        if not line:
+            return None
+        message = json.loads(line)
+        self.state.apply(message)
+        return message
+    
+    def close(self):
+        self.writer.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multiplayer snake server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mode", choices=[m.value for m in GameMode], default=GameMode.CLASSIC.value)
+    parser.add_argument("--grid-width", type=int, default=40)
+    parser.add_argument("--grid-height", type=int, default=30)
+    return parser.parse_args(argv)
+
+async def serve(args):
+    server = GameServer(args.grid_width, args.grid_height, GameMode(args.mode))
+    port = await server.start(args.host, args.port)
+    print(f"Listening on {args.host}:{port}")
+    await server.server.serve_forever()
+
+def main(argv=None):
+    try:
+        asyncio.run(serve(parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+"""Headless snake simulation.
+
+SnakeSim holds the game rules without touching pygame, so games can be
+stepped deterministically and as fast as the CPU allows. SnakeGame wraps it
+for rendering, sound and input.
+"""
+import random
+from collections import deque
+from enum import Enum
+from grid import OccupancyGrid, OBSTACLE, FOOD, POWER_UP
+
+TICK_RATE = 60  # Simulation ticks per second
+
+class Direction(Enum):
+    UP = (0, -1)
+    DOWN = (0, 1)
+    LEFT = (-1, 0)
+    RIGHT = (1, 0)
+
+OPPOSITE = {
+    Direction.UP: Direction.DOWN,
+    Direction.DOWN: Direction.UP,
+    Direction.LEFT: Direction.RIGHT,
+    Direction.RIGHT: Direction.LEFT
+}
+
+class PowerUpType(Enum):
+    SPEED_BOOST = "speed_boost"
+    SCORE_MULTIPLIER = "score_multiplier"
+    INVINCIBILITY = "invincibility"
+    GHOST_MODE = "ghost_mode"
+    DOUBLE_FOOD = "double_food"
+    SLOW_TIME = "slow_time"
+
+class GameMode(Enum):
+    CLASSIC = "classic"
+    SURVIVAL = "survival"
+    TIME_ATTACK = "time_attack"
+
+class PowerUp:
+    def __init__(self, pos, power_type):
+        self.pos = pos
+        self.type = power_type
+        self.animation_time = 0
+        self.lifetime = 5 * TICK_RATE  # 5 seconds
+    
+    def update(self):
+        self.animation_time += 0.2
+        self.lifetime -= 1
+        return self.lifetime > 0
+
+class Obstacle:
+    def __init__(self, pos):
+        self.pos = pos
+
+class SnakeSim:
+    """Pure-Python snake engine advanced one tick at a time by step().
+    
+    Every duration is counted in ticks of 1 / TICK_RATE seconds, so a game
+    plays out the same however fast or slow it is stepped.
+    """
+    
+    # Subclasses (e.g. SnakeGame's renderable pieces) can swap these in
+    power_up_class = PowerUp
+    obstacle_class = Obstacle
+    
+    # Balance settings, overridable per instance for simulation sweeps
+    power_up_chance = 0.1  # Chance to spawn a power-up after eating
+    survival_points_per_obstacle = 50
+    survival_max_obstacles = 15
+    
+    def __init__(self, grid_width, grid_height, game_mode=GameMode.CLASSIC, seed=None):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.rng = random.Random(seed)
+        self.grid = OccupancyGrid(grid_width, grid_height)
+        
+        # Game state
+        self.game_mode = game_mode
+        self.level = 1
+        self.time_left = 60  # For time attack mode
+        self.power_ups = []
+        self.obstacles = []
+        self.obstacles_version = 0  # Bumped whenever the layout changes
+        self.active_power_ups = {}
+        self.events = []
+        
+        self.reset(seed)
+    
+    def reset(self, seed=None):
+        """Reset the game to initial state.
+        
+        Every game runs on its own RNG stream. Its seed is kept in self.seed,
+        so a game can be replayed from the seed and the inputs alone; without
+        one, the next seed is drawn from the previous game's stream.
+        """
+        if seed is None:
+            seed = self.rng.getrandbits(64)
+        self.seed = seed
+        self.rng.seed(seed)
+        self.grid.clear()
+        
+        # Snake starts in the middle
+        self.snake = deque([(self.grid_width // 2, self.grid_height // 2)])
+        self.grid.add_body(self.head)
+        self.direction = Direction.RIGHT
+        self.next_direction = Direction.RIGHT
+        
+        # Clear effects
+        self.power_ups = []
+        self.obstacles = []
+        self.active_power_ups = {}
+        
+        # Food
+        self.food = None
+        self.place_food()
+        
+        # Game state
+        self.score = 0
+        self.level = 1
+        self.game_over = False
+        self.won = False
+        self.speed = 8  # Initial speed
+        self.tick = 0
+        self.last_move = None
+        self.score_multiplier = 1
+        self.events = []
+        
+        # Generate level obstacles
+        self.generate_obstacles()
+        
+        # Reset time for time attack mode
+        if self.game_mode == GameMode.TIME_ATTACK:
+            self.time_left = 60
+    
+    @property
+    def head(self):
+        return self.snake[0]
+    
+    @property
+    def tail(self):
+        return self.snake[-1]
+    
+    def set_game_mode(self, mode):
+        """Set the game mode."""
+        self.game_mode = mode
+        self.reset()
+    
+    def generate_obstacles(self):
+        """Generate obstacles based on current level and game mode."""
+        for obstacle in self.obstacles:
+            self.grid.remove(obstacle.pos, OBSTACLE)
+        self.obstacles = []
+        self.obstacles_version += 1
+        
+        if self.game_mode == GameMode.SURVIVAL:
+            # In survival mode, add more obstacles as score increases
+            num_obstacles = min(self.score // self.survival_points_per_obstacle,
+                                self.survival_max_obstacles)
+        elif self.game_mode == GameMode.CLASSIC:
+            # In classic mode, add obstacles based on level
+            num_obstacles = min(self.level - 1, 10) if self.level > 1 else 0
+        else:
+            # Time attack mode has fewer obstacles
+            num_obstacles = min(self.level // 2, 5) if self.level > 2 else 0
+        
+        for _ in range(num_obstacles):
+            attempts = 0
+            while attempts < 50:  # Prevent infinite loop
+                pos = self.grid.random_free(self.rng)
+                if pos is None:
+                    return
+                # Keep obstacles off the outer ring
+                if (0 < pos[0] < self.grid_width - 1 and
+                    0 < pos[1] < self.grid_height - 1):
+                    self.obstacles.append(self.obstacle_class(pos))
+                    self.grid.add(pos, OBSTACLE)
+                    break
+                attempts += 1
+    
+    def generate_food(self):
+        """Generate food at a random free position, or None if the board is full."""
+        pos = self.grid.random_free(self.rng)
+        if pos is None and self.power_ups:
+            # Only power-ups are left off the snake: share a cell with one
+            pos = self.rng.choice(self.power_ups).pos
+        return pos
+    
+    def place_food(self):
+        """Move the food to a new random position."""
+        if self.food is not None:
+            self.grid.remove(self.food, FOOD)
+        self.food = self.generate_food()
+        if self.food is not None:
+            self.grid.add(self.food, FOOD)
+    
+    def spawn_power_up(self):
+        """Randomly spawn a power-up."""
+        if self.rng.random() < self.power_up_chance:
+            power_type = self.rng.choice(list(PowerUpType))
+            pos = self.grid.random_free(self.rng)
+            if pos is not None:
+                self.power_ups.append(self.power_up_class(pos, power_type))
+                self.grid.add(pos, POWER_UP)
+    
+    def apply_power_up(self, power_type):
+        """Apply a power-up effect."""
+        if power_type == PowerUpType.SPEED_BOOST:
+            self.active_power_ups[power_type] = 5 * TICK_RATE  # 5 seconds
+            self.speed = min(self.speed + 5, 25)
+        elif power_type == PowerUpType.SCORE_MULTIPLIER:
+            self.active_power_ups[power_type] = 10 * TICK_RATE  # 10 seconds
+            self.score_multiplier = 2
+        elif power_type == PowerUpType.INVINCIBILITY:
+            self.active_power_ups[power_type] = 5 * TICK_RATE  # 5 seconds
+        elif power_type == PowerUpType.GHOST_MODE:
+            self.active_power_ups[power_type] = 5 * TICK_RATE  # 5 seconds
+        elif power_type == PowerUpType.DOUBLE_FOOD:
+            self.active_power_ups[power_type] = 10 * TICK_RATE  # 10 seconds
+        elif power_type == PowerUpType.SLOW_TIME:
+            self.active_power_ups[power_type] = 5 * TICK_RATE  # 5 seconds
+            self.speed = max(self.speed - 3, 3)
+    
+    def update_power_ups(self):
+        """Update active power-ups."""
+        expired = []
+        for power_type, duration in self.active_power_ups.items():
+            duration -= 1
+            if duration <= 0:
+                expired.append(power_type)
+                # Remove effects
+                if power_type == PowerUpType.SPEED_BOOST:
+                    self.speed = max(self.speed - 5, 8)
+                elif power_type == PowerUpType.SCORE_MULTIPLIER:
+                    self.score_multiplier = 1
+                elif power_type == PowerUpType.SLOW_TIME:
+                    self.speed = min(self.speed + 3, 20)
+            else:
+                self.active_power_ups[power_type] = duration
+        
+        for power_type in expired:
+            del self.active_power_ups[power_type]
+    
+    def update_board_power_ups(self):
+        """Age uncollected power-ups and drop the expired ones."""
+        alive = []
+        for power_up in self.power_ups:
+            if power_up.update():
+                alive.append(power_up)
+            else:
+                self.grid.remove(power_up.pos, POWER_UP)
+        self.power_ups = alive
+    
+    def set_direction(self, direction):
+        """Queue a direction change, ignoring reversals onto the body."""
+        if direction != OPPOSITE[self.direction]:
+            self.next_direction = direction
+    
+    def move_due(self):
+        """Check whether the snake will move on the next step()."""
+        if self.last_move is None:
+            return True
+        return (self.tick + 1) * 1000 / TICK_RATE - self.last_move >= 1000 // self.speed
+    
+    def is_safe(self, direction):
+        """Check whether moving in direction next would not end the game."""
+        if direction == OPPOSITE[self.direction]:
+            return False
+        dx, dy = direction.value
+        x, y = self.head[0] + dx, self.head[1] + dy
+        if not (0 <= x < self.grid_width and 0 <= y < self.grid_height):
+            if PowerUpType.GHOST_MODE not in self.active_power_ups:
+                return False
+            x %= self.grid_width
+            y %= self.grid_height
+        if PowerUpType.INVINCIBILITY in self.active_power_ups:
+            return True
+        return not self.grid.has_body((x, y)) and not self.grid.has((x, y), OBSTACLE)
+    
+    def end_game(self, reason):
+        """Mark the game as over and record why."""
+        self.game_over = True
+        self.events.append(("game_over", reason))
+    
+    def step(self, action=None):
+        """Advance the simulation by one tick.
+        
+        action is an optional Direction applied before the tick. Returns the
+        list of events raised during the tick, e.g. ("eat", pos).
+        """
+        self.events = []
+        if self.game_over:
+            return self.events
+        
+        if action is not None:
+            self.set_direction(action)
+        
+        self.tick += 1
+        
+        # Update time for time attack mode
+        if self.game_mode == GameMode.TIME_ATTACK:
+            self.time_left -= 1 / TICK_RATE
+            if self.time_left <= 0:
+                self.end_game("time_up")
+                return self.events
+        
+        # The snake moves every 1000 // speed milliseconds of simulated time
+        now = self.tick * 1000 / TICK_RATE
+        if self.last_move is None or now - self.last_move >= 1000 // self.speed:
+            self.last_move = now
+            self.move()
+            if self.game_over:
+                return self.events
+        
+        # Update power-ups even when snake isn't moving
+        self.update_board_power_ups()
+        self.update_power_ups()
+        
+        return self.events
+    
+    def move(self):
+        """Move the snake one cell and resolve collisions and pickups."""
+        # Update direction
+        self.direction = self.next_direction
+        
+        # Get new head position
+        head_x, head_y = self.head
+        dx, dy = self.direction.value
+        new_head = (head_x + dx, head_y + dy)
+        
+        # Check for wall collisions (unless in ghost mode)
+        if PowerUpType.GHOST_MODE not in self.active_power_ups:
+            if (new_head[0] < 0 or new_head[0] >= self.grid_width or
+                new_head[1] < 0 or new_head[1] >= self.grid_height):
+                self.end_game("wall")
+                return
+        else:
+            # Wrap around in ghost mode
+            new_head = (new_head[0] % self.grid_width, new_head[1] % self.grid_height)
+        
+        # Check for self collision (unless invincible)
+        if (PowerUpType.INVINCIBILITY not in self.active_power_ups and
+            self.grid.has_body(new_head)):
+            self.end_game("self")
+            return
+        
+        # Check for obstacle collision (unless invincible)
+        if (PowerUpType.INVINCIBILITY not in self.active_power_ups and
+            self.grid.has(new_head, OBSTACLE)):
+            self.end_game("obstacle")
+            return
+        
+        # Move snake
+        self.snake.appendleft(new_head)
+        self.grid.add_body(new_head)
+        
+        # Check if food is eaten
+        if new_head == self.food:
+            self.events.append(("move", new_head, None))
+            points = 10 * self.score_multiplier
+            if PowerUpType.DOUBLE_FOOD in self.active_power_ups:
+                points *= 2
+            self.score += points
+            self.events.append(("eat", self.food))
+            self.place_food()
+            
+            # Nowhere left to put food: the snake has filled the board
+            if self.food is None:
+                self.won = True
+                self.end_game("win")
+                return
+            
+            # Increase speed and level
+            if self.score % 100 == 0:
+                self.speed = min(self.speed + 1, 25)
+                self.level += 1
+                self.generate_obstacles()
+                self.events.append(("level_up",))
+            
+            # Spawn power-up occasionally
+            self.spawn_power_up()
+        else:
+            tail = self.snake.pop()
+            self.grid.remove_body(tail)
+            self.events.append(("move", new_head, tail))
+        
+        # Check for power-up collection
+        if self.grid.has(new_head, POWER_UP):
+            for power_up in self.power_ups[:]:
+                if new_head == power_up.pos:
+                    self.power_ups.remove(power_up)
+                    self.grid.remove(new_head, POWER_UP)
+                    self.apply_power_up(power_up.type)
+                    self.events.append(("power_up", power_up))
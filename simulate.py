@@ -0,0 +1,237 @@
+"""Run large batches of simulated games across every CPU core.
+
+Games are played headlessly with SnakeSim by a simple bot policy and
+sharded across a process pool in fixed-size chunks. Each chunk gets its own
+RNG seed derived from --seed and its index, so results don't depend on how
+chunks are scheduled. Workers write per-game results straight into a
+shared-memory buffer and send back running totals, which the parent merges
+as chunks finish.
+
+    python simulate.py --games 20000 --mode survival --power-up-chance 0.05 0.1 0.2
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool, resource_tracker, shared_memory
+import numpy as np
+from autopilot import Autopilot
+from sim import Direction, GameMode, SnakeSim, TICK_RATE
+
+# Per-game result columns in the shared buffer
+FIELDS = ("score", "level", "length", "ticks")
+
+def random_policy(sim, rng):
+    """Pick a random move that doesn't die immediately."""
+    safe = [d for d in Direction if sim.is_safe(d)]
+    return rng.choice(safe) if safe else None
+
+def greedy_policy(sim, rng):
+    """Head for the food along a safe move, breaking ties randomly."""
+    if sim.food is None:
+        return random_policy(sim, rng)
+    hx, hy = sim.head
+    fx, fy = sim.food
+    best = None
+    best_distance = math.inf
+    for direction in Direction:
+        if not sim.is_safe(direction):
+            continue
+        dx, dy = direction.value
+        distance = abs(hx + dx - fx) + abs(hy + dy - fy) + rng.random()
+        if distance < best_distance:
+            best, best_distance = direction, distance
+    return best
+
+def autopilot_policy(sim, follow_cycle=False):
+    """Build a policy backed by a pathfinding Autopilot for sim."""
+    pilot = Autopilot(sim, follow_cycle)
+    return lambda sim, rng: pilot.choose()
+
+# Policy name -> factory taking the SnakeSim the policy will drive
+POLICIES = {
+    "random": lambda sim: random_policy,
+    "greedy": lambda sim: greedy_policy,
+    "autopilot": autopilot_policy,
+    "hamiltonian": lambda sim: autopilot_policy(sim, follow_cycle=True)
+}
+
+def play(sim, policy, rng, max_ticks):
+    """Play one game to the end (or max_ticks) and return its result row."""
+    while not sim.game_over and sim.tick < max_ticks:
+        # Only ask the policy when the snake is about to move
+        action = policy(sim, rng) if sim.move_due() else None
+        sim.step(action)
+    return (sim.score, sim.level, len(sim.snake), sim.tick)
+
+def run_chunk(task):
+    """Worker: play one chunk of games and write them into shared memory."""
+    (shm_name, total_games, start, count, seed, config) = task
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        results = np.ndarray((total_games, len(FIELDS)), dtype=np.int64, buffer=shm.buf)
+        rng = random.Random(f"{seed}:{start}")
+        sim = SnakeSim(config["grid_width"], config["grid_height"],
+                       GameMode(config["mode"]), seed=rng.getrandbits(64))
+        policy = POLICIES[config["policy"]](sim)
+        sim.power_up_chance = config["power_up_chance"]
+        sim.survival_points_per_obstacle = config["survival_points_per_obstacle"]
+        sim.survival_max_obstacles = config["survival_max_obstacles"]
+        
+        for i in range(start, start + count):
+            sim.reset(rng.getrandbits(64))
+            results[i] = play(sim, policy, rng, config["max_ticks"])
+        
+        # Running totals for streaming aggregation in the parent
+        chunk = results[start:start + count].astype(np.float64)
+        summary = (count, chunk.sum(axis=0), (chunk ** 2).sum(axis=0),
+                   chunk.min(axis=0), chunk.max(axis=0))
+        del results, chunk
+        return summary
+    finally:
+        shm.close()
+
+class RunningStats:
+    """Merges per-chunk count/sum/sum-of-squares/min/max totals."""
+    
+    def __init__(self, width):
+        self.count = 0
+        self.total = np.zeros(width)
+        self.total_sq = np.zeros(width)
+        self.minimum = np.full(width, np.inf)
+        self.maximum = np.full(width, -np.inf)
+    
+    def add(self, summary):
+        count, total, total_sq, minimum, maximum = summary
+        self.count += count
+        self.total += total
+        self.total_sq += total_sq
+        self.minimum = np.minimum(self.minimum, minimum)
+        self.maximum = np.maximum(self.maximum, maximum)
+    
+    def mean(self):
+        return self.total / max(self.count, 1)
+    
+    def std(self):
+        mean = self.mean()
+        return np.sqrt(np.maximum(self.total_sq / max(self.count, 1) - mean ** 2, 0))
+
+def run(config, games, pool, workers, chunk_size, seed, progress=None):
+    """Simulate games for one configuration. Returns a summary dict."""
+    shm = shared_memory.SharedMemory(create=True, size=games * len(FIELDS) * 8)
+    try:
+        tasks = [(shm.name, games, start, min(chunk_size, games - start), seed, config)
+                 for start in range(0, games, chunk_size)]
+        stats = RunningStats(len(FIELDS))
+        started = time.perf_counter()
+        for summary in pool.imap_unordered(run_chunk, tasks):
+            stats.add(summary)
+            if progress:
+                progress(stats, games, time.perf_counter() - started)
+        elapsed = time.perf_counter() - started
+        
+        results = np.ndarray((games, len(FIELDS)), dtype=np.int64, buffer=shm.buf)
+        percentiles = np.percentile(results, (50, 95, 99), axis=0)
+        total_ticks = int(results[:, FIELDS.index("ticks")].sum())
+        del results
+    finally:
+        shm.close()
+        shm.unlink()
+    
+    summary = {
+        "config": config,
+        "games": games,
+        "workers": workers,
+        "seconds": elapsed,
+        "games_per_second": games / elapsed,
+        "ticks_per_second": total_ticks / elapsed,
+        "stats": {}
+    }
+    for i, field in enumerate(FIELDS):
+        summary["stats"][field] = {
+            "mean": stats.mean()[i],
+            "std": stats.std()[i],
+            "min": stats.minimum[i],
+            "max": stats.maximum[i],
+            "p50": percentiles[0][i],
+            "p95": percentiles[1][i],
+            "p99": percentiles[2][i]
+        }
+    return summary
+
+def print_progress(stats, games, elapsed):
+    mean = stats.mean()
+    sys.stderr.write(f"\r  {stats.count}/{games} games  "
+                     f"mean score {mean[0]:.1f}  mean length {mean[2]:.1f}  "
+                     f"{stats.count / elapsed:.0f} games/s ")
+    if stats.count == games:
+        sys.stderr.write("\n")
+
+def print_summary(summary):
+    config = summary["config"]
+    print(f"{config['mode']} / {config['policy']} / power-up chance {config['power_up_chance']}: "
+          f"{summary['games']} games in {summary['seconds']:.1f}s "
+          f"({summary['games_per_second']:.0f} games/s, "
+          f"{summary['ticks_per_second'] / 1e6:.2f}M ticks/s)")
+    for field, s in summary["stats"].items():
+        print(f"  {field:>6}: mean {s['mean']:9.1f}  std {s['std']:8.1f}  "
+              f"min {s['min']:7.0f}  p50 {s['p50']:7.0f}  p95 {s['p95']:7.0f}  "
+              f"p99 {s['p99']:7.0f}  max {s['max']:7.0f}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate snake games across all CPU cores")
+    parser.add_argument("--games", type=int, default=10000, help="games per configuration")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="games per task")
+    parser.add_argument("--seed", type=int, default=0, help="base RNG seed")
+    parser.add_argument("--mode", choices=[m.value for m in GameMode], default=GameMode.CLASSIC.value)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--grid-width", type=int, default=40)
+    parser.add_argument("--grid-height", type=int, default=30)
+    parser.add_argument("--max-ticks", type=int, default=10 * 60 * TICK_RATE,
+                        help="stop a game after this many ticks (default: 10 minutes)")
+    parser.add_argument("--power-up-chance", type=float, nargs="+",
+                        default=[SnakeSim.power_up_chance],
+                        help="one or more power-up spawn chances to sweep")
+    parser.add_argument("--survival-points-per-obstacle", type=int,
+                        default=SnakeSim.survival_points_per_obstacle)
+    parser.add_argument("--survival-max-obstacles", type=int,
+                        default=SnakeSim.survival_max_obstacles)
+    parser.add_argument("--json", metavar="PATH", help="also write the summaries as JSON")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    summaries = []
+    
+    # Start the resource tracker before forking so the workers share it
+    # instead of each starting one that reports the buffers as leaked
+    resource_tracker.ensure_running()
+    with Pool(args.workers) as pool:
+        for chance in args.power_up_chance:
+            config = {
+                "mode": args.mode,
+                "policy": args.policy,
+                "grid_width": args.grid_width,
+                "grid_height": args.grid_height,
+                "max_ticks": args.max_ticks,
+                "power_up_chance": chance,
+                "survival_points_per_obstacle": args.survival_points_per_obstacle,
+                "survival_max_obstacles": args.survival_max_obstacles
+            }
+            summary = run(config, args.games, pool, args.workers, args.chunk_size, args.seed,
+                          None if args.quiet else print_progress)
+            print_summary(summary)
+            summaries.append(summary)
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2, default=float)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,497 @@
+"""Compact binary game-state snapshots, deltas and client-side interpolation.
+
+For spectating or networked play, Snapshot captures what a viewer needs to
+draw a SnakeSim, and SnapshotEncoder packs it into a few bytes:
+
+    flags    which sections follow (a delta leaves unchanged ones out)
+    header   varint sequence number, base sequence number (0: none), tick
+    snake    head cell, then 2 bits per segment for the direction to the
+             next one; in a delta just the cells the head moved on and the
+             new length, since the rest of the body is the base's
+    sections food, obstacles, power-ups, active power-ups as a bitfield,
+             score/level/speed
+
+Timers are sent as the tick they run out, so they only change when a
+power-up is picked up. The encoder deltas against the last snapshot the
+client acknowledged, falling back to a full snapshot until it has one (or
+once that one is older than the decoder keeps), so lost packets cost
+nothing but a bigger next message. SnapshotDecoder rebuilds
+the snapshots, and Interpolator slides the snake smoothly between them so
+10 Hz updates draw cleanly at 60 FPS.
+
+    python snapshot.py --games 20 --rate 10 --loss 0.1
+
+plays autopilot games and reports bandwidth in bytes per tick.
+"""
+import argparse
+import json
+import random
+import sys
+from collections import deque
+from batch_env import POWER_UP_TYPES
+from replay import ReplayError, read_varint, write_varint
+from sim import Direction, GameMode, SnakeSim, TICK_RATE
+
+DIRECTIONS = list(Direction)
+
+# Flags: the sections present in an encoded snapshot
+SNAKE_FULL = 1
+SNAKE_DELTA = 2
+FOOD = 4
+OBSTACLES = 8
+POWER_UPS = 16
+ACTIVE = 32
+STATS = 64
+GAME_OVER = 128
+
+class SnapshotError(ValueError):
+    """Raised for data that isn't a valid snapshot, or a delta whose base is gone."""
+
+class Snapshot:
+    def __init__(self, tick=0, snake=(), food=-1, obstacles=(), power_ups=(), active=(),
+                 score=0, level=1, speed=8, end_tick=0, game_over=False):
+        self.tick = tick
+        self.snake = tuple(snake)  # Cells, head first
+        self.food = food  # Cell, or -1
+        self.obstacles = tuple(obstacles)
+        self.power_ups = tuple(power_ups)  # (cell, type index, tick it expires)
+        self.active = tuple(active)  # (type index, tick it runs out), in type order
+        self.score = score
+        self.level = level
+        self.speed = speed
+        self.end_tick = end_tick  # When time attack's clock runs out, 0 otherwise
+        self.game_over = game_over
+    
+    @classmethod
+    def capture(cls, sim):
+        grid = sim.grid
+        tick = sim.tick
+        end_tick = 0
+        if sim.game_mode == GameMode.TIME_ATTACK:
+            end_tick = tick + max(round(sim.time_left * TICK_RATE), 0)
+        return cls(
+            tick=tick,
+            snake=[grid.index(pos) for pos in sim.snake],
+            food=grid.index(sim.food) if sim.food is not None else -1,
+            obstacles=[grid.index(obstacle.pos) for obstacle in sim.obstacles],
+            power_ups=[(grid.index(power_up.pos), POWER_UP_TYPES.index(power_up.type),
+                        tick + power_up.lifetime) for power_up in sim.power_ups],
+            active=[(k, tick + sim.active_power_ups[power_type])
+                    for k, power_type in enumerate(POWER_UP_TYPES)
+                    if power_type in sim.active_power_ups],
+            score=sim.score,
+            level=sim.level,
+            speed=sim.speed,
+            end_tick=end_tick,
+            game_over=sim.game_over
+        )
+    
+    def stats(self):
+        return (self.score, self.level, self.speed, self.end_tick)
+
+def advance(old, new, limit=64):
+    """How many cells the head of snake old moved on to become snake new.
+    
+    Returns None if new isn't old moved forward (a new game, say). A move
+    of the whole length can't be told from a new snake, so callers check
+    the new cells really continue on from old's head.
+    """
+    for moved in range(min(len(new), limit) + 1):
+        rest = len(new) - moved
+        if rest <= len(old) and new[moved:] == old[:rest]:
+            return moved
+    return None
+
+def step_direction(a, b, width, height):
+    """Index in DIRECTIONS of the step from cell a to cell b, wrapping at the edges."""
+    ax, ay = a % width, a // width
+    for k, direction in enumerate(DIRECTIONS):
+        dx, dy = direction.value
+        if ((ay + dy) % height) * width + (ax + dx) % width == b:
+            return k
+    return None
+
+def take_step(cell, k, width, height):
+    dx, dy = DIRECTIONS[k].value
+    return ((cell // width + dy) % height) * width + (cell % width + dx) % width
+
+def write_steps(out, cells, width, height):
+    """Pack the steps between consecutive cells, 2 bits each. False if one isn't a step."""
+    byte = 0
+    for i in range(1, len(cells)):
+        k = step_direction(cells[i - 1], cells[i], width, height)
+        if k is None:
+            return False
+        byte |= k << 2 * ((i - 1) % 4)
+        if i % 4 == 0 or i == len(cells) - 1:
+            out.append(byte)
+            byte = 0
+    return True
+
+def read_steps(data, offset, start, count, width, height):
+    """Unpack count steps from start. Returns (cells after start, next offset)."""
+    cells = []
+    cell = start
+    for i in range(count):
+        if offset + i // 4 >= len(data):
+            raise SnapshotError("truncated snapshot")
+        k = data[offset + i // 4] >> 2 * (i % 4) & 3
+        cell = take_step(cell, k, width, height)
+        cells.append(cell)
+    return cells, offset + (count + 3) // 4
+
+def encode_snapshot(snapshot, seq, width, height, base=None, base_seq=0):
+    """Encode snapshot, as a delta against base if given."""
+    flags = 0
+    body = bytearray()
+    
+    # Snake: the new head cells and the length, or the whole body
+    moved = advance(base.snake, snapshot.snake) if base is not None else None
+    snake = bytearray()
+    if moved is not None:
+        if moved or len(snapshot.snake) != len(base.snake):
+            path = (base.snake[0],) + snapshot.snake[:moved][::-1]
+            write_varint(snake, moved)
+            write_varint(snake, len(snapshot.snake))
+            if write_steps(snake, path, width, height):
+                flags |= SNAKE_DELTA
+                body += snake
+            else:
+                moved = None
+    if moved is None:
+        # Length << 1, then the head and packed steps, or with the low bit
+        # set every cell as it is if the body isn't contiguous
+        snake = bytearray()
+        write_varint(snake, len(snapshot.snake) << 1)
+        if snapshot.snake:
+            write_varint(snake, snapshot.snake[0])
+            if not write_steps(snake, snapshot.snake, width, height):
+                snake = bytearray()
+                write_varint(snake, len(snapshot.snake) << 1 | 1)
+                for cell in snapshot.snake:
+                    write_varint(snake, cell)
+        flags |= SNAKE_FULL
+        body += snake
+    
+    if base is None or snapshot.food != base.food:
+        flags |= FOOD
+        write_varint(body, snapshot.food + 1)
+    if base is None or snapshot.obstacles != base.obstacles:
+        flags |= OBSTACLES
+        write_varint(body, len(snapshot.obstacles))
+        for cell in snapshot.obstacles:
+            write_varint(body, cell)
+    if base is None or snapshot.power_ups != base.power_ups:
+        flags |= POWER_UPS
+        write_varint(body, len(snapshot.power_ups))
+        for cell, power_type, expires in snapshot.power_ups:
+            write_varint(body, cell)
+            body.append(power_type)
+            write_varint(body, max(expires - snapshot.tick, 0))
+    if base is None or snapshot.active != base.active:
+        flags |= ACTIVE
+        mask = 0
+        for power_type, _ in snapshot.active:
+            mask |= 1 << power_type
+        body.append(mask)
+        for _, expires in snapshot.active:
+            write_varint(body, max(expires - snapshot.tick, 0))
+    if base is None or snapshot.stats() != base.stats():
+        flags |= STATS
+        write_varint(body, snapshot.score)
+        write_varint(body, snapshot.level)
+        write_varint(body, snapshot.speed)
+        write_varint(body, max(snapshot.end_tick - snapshot.tick + 1, 1) if snapshot.end_tick else 0)
+    if snapshot.game_over:
+        flags |= GAME_OVER
+    
+    out = bytearray([flags])
+    write_varint(out, seq)
+    write_varint(out, base_seq if base is not None else 0)
+    write_varint(out, snapshot.tick - base.tick if base is not None else snapshot.tick)
+    return bytes(out + body)
+
+def decode_snapshot(data, width, height, bases):
+    """Decode a snapshot; bases maps sequence numbers to earlier Snapshots.
+    
+    Returns (seq, Snapshot).
+    """
+    try:
+        return read_snapshot(data, width, height, bases)
+    except (ReplayError, IndexError) as e:
+        raise SnapshotError("truncated snapshot") from e
+
+def read_snapshot(data, width, height, bases):
+    flags = data[0]
+    seq, offset = read_varint(data, 1)
+    base_seq, offset = read_varint(data, offset)
+    tick, offset = read_varint(data, offset)
+    base = None
+    if base_seq:
+        base = bases.get(base_seq)
+        if base is None:
+            raise SnapshotError(f"snapshot {seq} is a delta against unknown snapshot {base_seq}")
+        tick += base.tick
+    snapshot = Snapshot(tick=tick)
+    if base is not None:
+        snapshot.__dict__.update({key: value for key, value in base.__dict__.items() if key != "tick"})
+    
+    if flags & SNAKE_DELTA:
+        moved, offset = read_varint(data, offset)
+        length, offset = read_varint(data, offset)
+        cells, offset = read_steps(data, offset, base.snake[0], moved, width, height)
+        snapshot.snake = (tuple(cells[::-1]) + base.snake)[:length]
+    elif flags & SNAKE_FULL:
+        value, offset = read_varint(data, offset)
+        length = value >> 1
+        if value & 1:
+            snake = []
+            for _ in range(length):
+                cell, offset = read_varint(data, offset)
+                snake.append(cell)
+            snapshot.snake = tuple(snake)
+        elif length:
+            head, offset = read_varint(data, offset)
+            cells, offset = read_steps(data, offset, head, length - 1, width, height)
+            snapshot.snake = (head,) + tuple(cells)
+        else:
+            snapshot.snake = ()
+    
+    if flags & FOOD:
+        food, offset = read_varint(data, offset)
+        snapshot.food = food - 1
+    if flags & OBSTACLES:
+        count, offset = read_varint(data, offset)
+        obstacles = []
+        for _ in range(count):
+            cell, offset = read_varint(data, offset)
+            obstacles.append(cell)
+        snapshot.obstacles = tuple(obstacles)
+    if flags & POWER_UPS:
+        count, offset = read_varint(data, offset)
+        power_ups = []
+        for _ in range(count):
+            cell, offset = read_varint(data, offset)
+            power_type = data[offset]
+            remaining, offset = read_varint(data, offset + 1)
+            power_ups.append((cell, power_type, tick + remaining))
+        snapshot.power_ups = tuple(power_ups)
+    if flags & ACTIVE:
+        mask = data[offset]
+        offset += 1
+        active = []
+        for power_type in range(len(POWER_UP_TYPES)):
+            if mask >> power_type & 1:
+                remaining, offset = read_varint(data, offset)
+                active.append((power_type, tick + remaining))
+        snapshot.active = tuple(active)
+    if flags & STATS:
+        snapshot.score, offset = read_varint(data, offset)
+        snapshot.level, offset = read_varint(data, offset)
+        snapshot.speed, offset = read_varint(data, offset)
+        remaining, offset = read_varint(data, offset)
+        snapshot.end_tick = tick + remaining - 1 if remaining else 0
+    snapshot.game_over = bool(flags & GAME_OVER)
+    return seq, snapshot
+
+class SnapshotEncoder:
+    """Sender side: deltas against the newest snapshot the client acknowledged."""
+    
+    def __init__(self, width, height, history=32):
+        self.width = width
+        self.height = height
+        self.history = history
+        self.sent = {}  # seq -> Snapshot, for snapshots not yet superseded by an ack
+        self.seq = 0
+        self.acked = 0
+        self.bytes_sent = 0
+        self.first_tick = None
+        self.last_tick = None
+    
+    def encode(self, snapshot):
+        self.seq += 1
+        # The decoder only keeps the last history snapshots as bases, so
+        # after a long run of lost acks start over from a full snapshot
+        base = self.sent.get(self.acked) if self.seq - self.acked < self.history else None
+        data = encode_snapshot(snapshot, self.seq, self.width, self.height, base, self.acked)
+        self.sent[self.seq] = snapshot
+        # Keep the acked base plus the newest history snapshots
+        for seq in [seq for seq in self.sent if seq != self.acked and seq <= self.seq - self.history]:
+            del self.sent[seq]
+        
+        self.bytes_sent += len(data)
+        if self.first_tick is None:
+            self.first_tick = snapshot.tick
+        self.last_tick = snapshot.tick
+        return data
+    
+    def ack(self, seq):
+        """The client has snapshot seq; later deltas may be built on it."""
+        if seq > self.acked and seq in self.sent:
+            self.acked = seq
+            for old in [old for old in self.sent if old < seq]:
+                del self.sent[old]
+    
+    def bytes_per_tick(self):
+        if self.first_tick is None or self.last_tick == self.first_tick:
+            return float(self.bytes_sent)
+        return self.bytes_sent / (self.last_tick - self.first_tick)
+
+class SnapshotDecoder:
+    """Receiver side: rebuilds snapshots and remembers recent ones as delta bases."""
+    
+    def __init__(self, width, height, history=32):
+        self.width = width
+        self.height = height
+        self.history = history
+        self.received = {}  # seq -> Snapshot
+        self.latest = 0
+    
+    def decode(self, data):
+        """Decode one message. Returns (seq, Snapshot); acknowledge seq to the sender."""
+        seq, snapshot = decode_snapshot(data, self.width, self.height, self.received)
+        self.received[seq] = snapshot
+        self.latest = max(self.latest, seq)
+        for old in [old for old in self.received if old <= self.latest - self.history]:
+            del self.received[old]
+        return seq, snapshot
+
+class Interpolator:
+    """Smooths the snake between snapshots for drawing.
+    
+    The view runs delay ticks behind the newest snapshot, so there is
+    usually one on either side of the time being drawn. The snake slides
+    along the path its head took between them rather than jumping.
+    """
+    
+    def __init__(self, width, height, delay=6):
+        self.width = width
+        self.height = height
+        self.delay = delay
+        self.snapshots = deque(maxlen=8)
+    
+    def push(self, snapshot):
+        if not self.snapshots or snapshot.tick > self.snapshots[-1].tick:
+            self.snapshots.append(snapshot)
+    
+    def sample(self, tick):
+        """Segment positions as (x, y) floats in cells at tick, and the snapshot to draw the rest from."""
+        if not self.snapshots:
+            return [], None
+        render_tick = tick - self.delay
+        older = newer = None
+        for snapshot in self.snapshots:
+            if snapshot.tick <= render_tick:
+                older = snapshot
+            elif older is not None:
+                newer = snapshot
+                break
+        if older is None:
+            older = self.snapshots[0]
+        if newer is None:
+            return self.positions(older.snake, 0.0, len(older.snake)), older
+        
+        moved = advance(older.snake, newer.snake)
+        if moved is None:
+            return self.positions(older.snake, 0.0, len(older.snake)), older
+        fraction = (render_tick - older.tick) / (newer.tick - older.tick)
+        path = newer.snake[:moved] + older.snake
+        return self.positions(path, (1 - fraction) * moved, len(newer.snake)), older
+    
+    def positions(self, path, offset, count):
+        """count points spaced one cell apart along path, starting offset cells in."""
+        points = []
+        last = len(path) - 1
+        for i in range(count):
+            distance = min(offset + i, last)
+            k = int(distance)
+            x, y = path[k] % self.width, path[k] // self.width
+            if k < last:
+                fraction = distance - k
+                nx, ny = path[k + 1] % self.width, path[k + 1] // self.width
+                # Don't slide across the board where a ghost snake wraps
+                if abs(nx - x) + abs(ny - y) == 1:
+                    x += (nx - x) * fraction
+                    y += (ny - y) * fraction
+            points.append((x, y))
+        return points
+
+def naive_size(sim):
+    """Bytes for the whole state as JSON, the straightforward alternative."""
+    return len(json.dumps({
+        "snake": list(sim.snake),
+        "food": sim.food,
+        "obstacles": [obstacle.pos for obstacle in sim.obstacles],
+        "power_ups": [(power_up.pos, power_up.type.value, power_up.lifetime)
+                      for power_up in sim.power_ups],
+        "active": {power_type.value: ticks for power_type, ticks in sim.active_power_ups.items()},
+        "score": sim.score, "level": sim.level, "time_left": sim.time_left
+    }))
+
+def measure(games, rate, loss, grid_width=40, grid_height=30, game_mode=GameMode.CLASSIC, seed=0):
+    """Stream autopilot games at rate snapshots per second over a lossy link.
+    
+    Returns bytes per tick for the deltas, full snapshots every time and
+    JSON every tick, and checks every delivered snapshot decodes exactly.
+    """
+    from autopilot import Autopilot
+    rng = random.Random(seed)
+    interval = max(TICK_RATE // rate, 1)
+    totals = {"delta": 0, "full": 0, "json": 0, "ticks": 0, "snapshots": 0, "lost": 0}
+    sim = SnakeSim(grid_width, grid_height, game_mode, seed=rng.getrandbits(64))
+    pilot = Autopilot(sim)
+    for _ in range(games):
+        sim.reset(rng.getrandbits(64))
+        encoder = SnapshotEncoder(grid_width, grid_height)
+        decoder = SnapshotDecoder(grid_width, grid_height)
+        while True:
+            if sim.tick % interval == 0 or sim.game_over:
+                snapshot = Snapshot.capture(sim)
+                data = encoder.encode(snapshot)
+                totals["delta"] += len(data)
+                totals["full"] += len(encode_snapshot(snapshot, 1, grid_width, grid_height))
+                totals["snapshots"] += 1
+                if rng.random() < loss:
+                    totals["lost"] += 1
+                else:
+                    seq, received = decoder.decode(data)
+                    if received.__dict__ != snapshot.__dict__:
+                        raise SnapshotError(f"snapshot {seq} decoded differently")
+                    # Acks can be lost too
+                    if rng.random() >= loss:
+                        encoder.ack(seq)
+            totals["json"] += naive_size(sim)
+            if sim.game_over or sim.tick >= 10 * 60 * TICK_RATE:
+                break
+            sim.step(pilot.choose() if sim.move_due() else None)
+            totals["ticks"] += 1
+    ticks = max(totals["ticks"], 1)
+    return {
+        "ticks": totals["ticks"],
+        "snapshots": totals["snapshots"],
+        "lost": totals["lost"],
+        "delta_bytes_per_tick": totals["delta"] / ticks,
+        "full_bytes_per_tick": totals["full"] / ticks,
+        "json_every_tick_bytes_per_tick": totals["json"] / ticks
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure snapshot bandwidth on autopilot games")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--rate", type=int, default=10, help="snapshots per second")
+    parser.add_argument("--loss", type=float, default=0.0, help="chance a packet or ack is lost")
+    parser.add_argument("--mode", choices=[m.value for m in GameMode], default=GameMode.CLASSIC.value)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = measure(args.games, args.rate, args.loss, game_mode=GameMode(args.mode), seed=args.seed)
+    print(f"{result['ticks']} ticks, {result['snapshots']} snapshots ({result['lost']} lost)")
+    print(f"  delta snapshots   {result['delta_bytes_per_tick']:8.2f} bytes/tick")
+    print(f"  full snapshots    {result['full_bytes_per_tick']:8.2f} bytes/tick")
+    print(f"  JSON every tick   {result['json_every_tick_bytes_per_tick']:8.2f} bytes/tick")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Watch an autopilot game through the snapshot pipeline.
+
+The game runs locally at the full tick rate, but the view only sees what a
+remote spectator would: snapshots encoded at --rate per second, some of
+them dropped with --loss, decoded and smoothed by snapshot.Interpolator
+and drawn at 60 FPS.
+
+    python spectator.py --rate 10 --loss 0.1
+"""
+import argparse
+import random
+import sys
+import pygame
+from autopilot import Autopilot
+from batch_env import POWER_UP_TYPES
+from game import POWER_UP_COLORS, SNAKE_COLORS
+from sim import GameMode, SnakeSim, TICK_RATE
+from snapshot import Interpolator, Snapshot, SnapshotDecoder, SnapshotEncoder, SnapshotError
+from sprites import SpriteAtlas
+
+GRID_SIZE = 20
+FPS = 60
+
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GRAY = (100, 100, 100)
+
+class SpectatorView:
+    """Draws decoded snapshots, with the snake from the interpolator."""
+    
+    def __init__(self, screen, width, height):
+        self.screen = screen
+        self.width = width
+        self.height = height
+        self.atlas = SpriteAtlas(GRID_SIZE)
+        self.head_color, self.body_color = SNAKE_COLORS["normal"]
+    
+    def cell_pos(self, cell):
+        return (cell % self.width * GRID_SIZE, cell // self.width * GRID_SIZE)
+    
+    def draw(self, positions, snapshot):
+        self.screen.fill(BLACK)
+        if snapshot is None:
+            return
+        
+        obstacle = self.atlas.tile(GRAY, BLACK, 1)
+        self.screen.blits([(obstacle, self.cell_pos(cell)) for cell in snapshot.obstacles], False)
+        if snapshot.food >= 0:
+            self.screen.blit(self.atlas.tile(RED, BLACK, 1, 3), self.cell_pos(snapshot.food))
+        for cell, power_type, expires in snapshot.power_ups:
+            color = POWER_UP_COLORS[POWER_UP_TYPES[power_type]]
+            self.screen.blit(self.atlas.tile(color, BLACK, 1, 3), self.cell_pos(cell))
+        
+        # Segments sit between cells while sliding, so draw them as circles
+        radius = GRID_SIZE // 2
+        for i in range(len(positions) - 1, -1, -1):
+            x, y = positions[i]
+            center = (round(x * GRID_SIZE) + radius, round(y * GRID_SIZE) + radius)
+            pygame.draw.circle(self.screen, self.head_color if i == 0 else self.body_color,
+                               center, radius - 1)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Watch an autopilot game through snapshots")
+    parser.add_argument("--rate", type=int, default=10, help="snapshots per second")
+    parser.add_argument("--loss", type=float, default=0.0, help="chance a snapshot or ack is lost")
+    parser.add_argument("--mode", choices=[m.value for m in GameMode], default=GameMode.CLASSIC.value)
+    parser.add_argument("--grid-width", type=int, default=40)
+    parser.add_argument("--grid-height", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--frames", type=int, default=0, help="stop after this many frames (0: run until closed)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    width, height = args.grid_width, args.grid_height
+    rng = random.Random(args.seed)
+    interval = max(TICK_RATE // args.rate, 1)
+    
+    pygame.init()
+    screen = pygame.display.set_mode((width * GRID_SIZE, height * GRID_SIZE))
+    pygame.display.set_caption("Snake spectator")
+    clock = pygame.time.Clock()
+    view = SpectatorView(screen, width, height)
+    
+    sim = SnakeSim(width, height, GameMode(args.mode), rng.getrandbits(64))
+    pilot = Autopilot(sim)
+    encoder = SnapshotEncoder(width, height)
+    decoder = SnapshotDecoder(width, height)
+    # Stay far enough behind that a lost snapshot still leaves one to slide toward
+    interpolator = Interpolator(width, height, delay=2 * interval)
+    
+    frames = 0
+    accumulator = 0.0
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        
+        accumulator += clock.tick(FPS) / 1000
+        while accumulator >= 1 / TICK_RATE:
+            accumulator -= 1 / TICK_RATE
+            if sim.game_over:
+                sim.reset(rng.getrandbits(64))
+                encoder = SnapshotEncoder(width, height)
+                decoder = SnapshotDecoder(width, height)
+                interpolator = Interpolator(width, height, delay=2 * interval)
+            sim.step(pilot.choose() if sim.move_due() else None)
+            if sim.tick % interval == 0 or sim.game_over:
+                data = encoder.encode(Snapshot.capture(sim))
+                if rng.random() >= args.loss:
+                    try:
+                        seq, snapshot = decoder.decode(data)
+                    except SnapshotError:
+                        # Wait for one we can decode, as a remote viewer would
+                        continue
+                    interpolator.push(snapshot)
+                    if rng.random() >= args.loss:
+                        encoder.ack(seq)
+        
+        view.draw(*interpolator.sample(sim.tick))
+        pygame.display.flip()
+        frames += 1
+        if args.frames and frames >= args.frames:
+            running = False
+    
+    print(f"{encoder.bytes_per_tick():.2f} bytes/tick in the last game")
+    pygame.quit()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
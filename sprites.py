@@ -0,0 +1,61 @@
+"""Pre-rendered sprites for the game board.
+
+SpriteAtlas rasterizes each cell tile (snake segments, food, obstacles) and
+each power-up pulse frame once, so rendering is a batch of blits instead of
+shape drawing and per-frame surface allocation. Sprites are created on first
+use and cached; prebuilding them up front keeps the first frames smooth.
+"""
+import pygame
+
+class SpriteAtlas:
+    def __init__(self, grid_size):
+        self.grid_size = grid_size
+        self.sprites = {}
+        
+        # Power-ups pulse between 70% and 100% of a cell
+        self.power_up_sizes = range(int(grid_size * 0.7), grid_size + 1)
+    
+    def tile(self, color, border_color=None, border_width=1, radius=0):
+        """A cell-sized rounded rect with an optional square border."""
+        key = ('tile', color, border_color, border_width, radius)
+        surf = self.sprites.get(key)
+        if surf is None:
+            surf = pygame.Surface((self.grid_size, self.grid_size), pygame.SRCALPHA)
+            rect = surf.get_rect()
+            pygame.draw.rect(surf, color, rect, border_radius=radius)
+            if border_color is not None:
+                pygame.draw.rect(surf, border_color, rect, border_width)
+            self.sprites[key] = surf
+        return surf
+    
+    def power_up(self, color, size):
+        """A power-up core of the given pulse size inside its translucent glow.
+        
+        Returns (sprite, offset) where offset is the sprite's top-left
+        position relative to the cell's top-left corner.
+        """
+        key = ('power_up', color, size)
+        entry = self.sprites.get(key)
+        if entry is None:
+            glow_size = int(size * 1.5)
+            surf = pygame.Surface((glow_size, glow_size), pygame.SRCALPHA)
+            pygame.draw.rect(surf, (*color, 50), surf.get_rect(), border_radius=glow_size // 4)
+            
+            # The glow is the core's color, so an opaque core drawn over it
+            # looks the same as the glow blitted on top of the core
+            offset = (self.grid_size - glow_size) // 2
+            inset = (self.grid_size - size) // 2 - offset
+            core = pygame.Rect(inset, inset, size, size)
+            pygame.draw.rect(surf, color, core, border_radius=size // 4)
+            
+            entry = (surf, (offset, offset))
+            self.sprites[key] = entry
+        return entry
+    
+    def prebuild(self, tiles, power_up_colors):
+        """Render the given tile specs and every pulse frame of each power-up color."""
+        for spec in tiles:
+            self.tile(*spec)
+        for color in power_up_colors:
+            for size in self.power_up_sizes:
+                self.power_up(color, size)
@@ -0,0 +1,90 @@
+"""Procedural sound synthesis.
+
+Notes, note sequences and chords are generated with whole-array NumPy
+operations and returned as stereo int16 sample arrays ready for
+pygame.sndarray.make_sound. Rendered samples are cached on disk as .npy
+files keyed by the synth parameters, so later launches just load them.
+"""
+import hashlib
+import io
+import os
+import numpy as np
+from fileio import write_atomic
+
+SAMPLE_RATE = 22050
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'sounds')
+CACHE_VERSION = 1  # Bump when the synthesis code changes output
+
+def sine(frequency, sample_index):
+    """Sine wave at frequency sampled at the given absolute sample indices."""
+    return np.sin(2 * np.pi * frequency * sample_index / SAMPLE_RATE)
+
+def stereo(wave):
+    """Truncate a float wave to int16 and duplicate it into two channels."""
+    samples = wave.astype(np.int16)
+    return np.column_stack((samples, samples))
+
+def beep(frequency, duration, amplitude=4096):
+    """A single constant-amplitude note."""
+    frames = int(duration * SAMPLE_RATE)
+    return stereo(amplitude * sine(frequency, np.arange(frames)))
+
+def sequence(frequencies, duration, amplitude, fade):
+    """Equal-length notes played one after another.
+    
+    Each note's amplitude falls linearly by the fraction fade over the note.
+    Any frames left over after the last full note stay silent.
+    """
+    frames = int(duration * SAMPLE_RATE)
+    frames_per_note = frames // len(frequencies)
+    wave = np.zeros(frames)
+    envelope = amplitude * (1 - np.arange(frames_per_note) / frames_per_note * fade)
+    for note, frequency in enumerate(frequencies):
+        start = note * frames_per_note
+        index = np.arange(start, start + frames_per_note)
+        wave[start:start + frames_per_note] = envelope * sine(frequency, index)
+    return stereo(wave)
+
+def chords(progression, duration, amplitude):
+    """Chords played back to back, each taking an equal share of the duration."""
+    frames = int(duration * SAMPLE_RATE)
+    index = np.arange(frames)
+    # Chord number for each sample
+    which = (index * len(progression)) // frames
+    wave = np.zeros(frames)
+    for number, chord in enumerate(progression):
+        mask = which == number
+        for frequency in chord:
+            wave[mask] += amplitude * sine(frequency, index[mask])
+    return stereo(wave)
+
+# Synth functions that render() can build and cache by name
+SYNTHS = {
+    'beep': beep,
+    'sequence': sequence,
+    'chords': chords
+}
+
+def cache_path(name, params):
+    key = hashlib.sha1(repr((CACHE_VERSION, SAMPLE_RATE, name, params)).encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{name}-{key[:16]}.npy")
+
+def render(name, *params):
+    """Return the samples for synth function name(*params), using the disk cache."""
+    path = cache_path(name, params)
+    try:
+        return np.load(path)
+    except (OSError, ValueError):
+        pass
+    
+    samples = SYNTHS[name](*params)
+    
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        buffer = io.BytesIO()
+        np.save(buffer, samples)
+        write_atomic(path, buffer.getvalue())
+    except OSError:
+        # Read-only install: just don't cache
+        pass
+    return samples
@@ -0,0 +1,56 @@
+"""Shared cache of rendered text surfaces.
+
+Font rasterization is one of the most expensive per-frame costs in the menu
+and game loops, and most text (labels, instructions, HUD values) is the same
+from one frame to the next. render_text returns the cached surface for a
+(font, text, color) combination and only calls font.render on a miss.
+
+Fonts themselves are loaded once per size by load_font and shared, which
+also lets the game, menu and buttons hit the same cached text.
+"""
+import pygame
+from collections import OrderedDict
+
+class TextCache:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def render(self, font, text, color, antialias=True):
+        """Return a rendered text surface, reusing a cached one when possible."""
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            # Evict the least recently used entry
+            self.surfaces.popitem(last=False)
+        return surface
+    
+    def clear(self):
+        self.surfaces.clear()
+
+# Cache shared by the game, menu and buttons
+text_cache = TextCache()
+
+# Default-font Font objects by size
+fonts = {}
+
+def load_font(size):
+    """Return the shared default font of the given size, loading it on first use."""
+    font = fonts.get(size)
+    if font is None:
+        font = fonts[size] = pygame.font.Font(None, size)
+    return font
+
+def render_text(font, text, color, antialias=True):
+    """Render text through the shared cache."""
+    return text_cache.render(font, text, color, antialias)